@@ -0,0 +1,67 @@
+"""
+Compare `count_lines_multi` against a serial `count_lines` loop.
+
+Usage:
+    python benchmarks/bench_count_lines.py [--files 200] [--lines 50000]
+"""
+
+import argparse
+import gzip
+import tempfile
+import time
+from pathlib import Path
+
+from jburt.file import count_lines
+from jburt.file import count_lines_multi
+
+
+def make_files(root: Path, n_files: int, n_lines: int, compress: bool) -> list:
+    line = b'{"id": 0, "text": "lorem ipsum dolor sit amet"}\n'
+    body = line * n_lines
+    files = []
+    for i in range(n_files):
+        if compress:
+            path = root / f'shard_{i:05d}.jsonl.gz'
+            with gzip.open(path, 'wb', compresslevel=1) as f:
+                f.write(body)
+        else:
+            path = root / f'shard_{i:05d}.jsonl'
+            path.write_bytes(body)
+        files.append(path)
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--lines', type=int, default=50000)
+    parser.add_argument('--jobs', type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        plain = make_files(root, args.files, args.lines, compress=False)
+
+        t0 = time.perf_counter()
+        serial = sum(count_lines(f) for f in plain)
+        t_serial = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        _, total = count_lines_multi(plain, n_jobs=args.jobs)
+        t_multi = time.perf_counter() - t0
+        assert total == serial
+
+        print(f'plain  serial count_lines : {t_serial:8.3f} s')
+        print(f'plain  count_lines_multi  : {t_multi:8.3f} s '
+              f'({t_serial / t_multi:.1f}x)')
+
+        gz = make_files(root, args.files, args.lines, compress=True)
+        t0 = time.perf_counter()
+        _, total = count_lines_multi(gz, n_jobs=args.jobs)
+        t_gz = time.perf_counter() - t0
+        assert total == serial
+        print(f'gzip   count_lines_multi  : {t_gz:8.3f} s')
+
+
+if __name__ == '__main__':
+    main()
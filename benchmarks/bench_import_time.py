@@ -0,0 +1,88 @@
+"""
+Measure the import time of each jburt submodule with ``python -X importtime``.
+
+Each submodule is imported in a fresh interpreter. Results can be written to
+JSON and compared against a previous run.
+
+Usage:
+    python benchmarks/bench_import_time.py [--repeat 5] [--json out.json]
+                                           [--baseline old.json]
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+
+SUBMODULES = [
+    "jburt",
+    "jburt.checks",
+    "jburt.file",
+    "jburt.filter",
+    "jburt.log",
+    "jburt.mask",
+    "jburt.math",
+    "jburt.matrix",
+    "jburt.notebook",
+    "jburt.objects",
+    "jburt.pdf",
+    "jburt.plot",
+    "jburt.signal",
+    "jburt.stats",
+    "jburt.transform",
+    "jburt.llm.agent",
+    "jburt.text.convert",
+]
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)")
+
+
+def import_time_us(module: str) -> int:
+    """Cumulative import time of `module` in a fresh interpreter, in us."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m and m.group(3) == module:
+            return int(m.group(2))
+    raise RuntimeError(f"no importtime entry for {module}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against this results file")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    for module in SUBMODULES:
+        try:
+            times = [import_time_us(module) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{module:<22} failed: {e}")
+            continue
+        results[module] = min(times)
+        line = f"{module:<22} {results[module] / 1000:9.1f} ms"
+        if module in baseline:
+            line += f"  (baseline {baseline[module] / 1000:9.1f} ms)"
+        print(line)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark JsonlWriter and read_jsonl on a large JSON Lines file.
+
+Compares against a naive ``json.loads`` / ``json.dumps`` loop; the jburt
+functions use orjson when it is installed.
+
+Usage:
+    python benchmarks/bench_jsonl.py [--lines 1000000]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from jburt import file as jfile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lines', type=int, default=1_000_000)
+    parser.add_argument('--batch-size', type=int, default=1024)
+    args = parser.parse_args()
+    records = ({'request_id': f'user-{i:07d}', 'title': 'lorem ipsum',
+                'body': 'dolor sit amet ' * 8, 'score': i * 0.5}
+               for i in range(args.lines))
+    backend = 'orjson' if jfile.orjson is not None else 'json'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'bench.jsonl'
+
+        t0 = time.perf_counter()
+        with jfile.JsonlWriter(path) as w:
+            w.write_many(records)
+        print(f'JsonlWriter ({backend})     : '
+              f'{time.perf_counter() - t0:8.3f} s')
+
+        t0 = time.perf_counter()
+        with open(path) as f:
+            n_naive = sum(1 for line in f if json.loads(line))
+        print(f'naive json.loads loop     : '
+              f'{time.perf_counter() - t0:8.3f} s')
+
+        t0 = time.perf_counter()
+        n = sum(len(b) for b in jfile.read_jsonl_batches(
+            path, batch_size=args.batch_size))
+        print(f'read_jsonl_batches ({backend}): '
+              f'{time.perf_counter() - t0:8.3f} s')
+        assert n == n_naive == args.lines
+
+        t0 = time.perf_counter()
+        n = sum(1 for _ in jfile.read_jsonl(path, keys=['request_id']))
+        print(f'read_jsonl, 1 key         : '
+              f'{time.perf_counter() - t0:8.3f} s')
+
+
+if __name__ == '__main__':
+    main()
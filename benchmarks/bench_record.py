@@ -0,0 +1,69 @@
+"""
+Compare Record and dotdict: construction, attribute reads, nested reads and
+memory per instance.
+
+Usage:
+    python benchmarks/bench_record.py [--n 1000000]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from jburt.objects import dotdict
+from jburt.objects import record
+from jburt.objects import record_type
+
+
+def timed(label, func, n):
+    t0 = time.perf_counter()
+    func()
+    dt = time.perf_counter() - t0
+    print(f'{label:<28}: {dt:8.3f} s  ({dt / n * 1e9:6.1f} ns/op)')
+
+
+def memory_per_instance(make, n):
+    tracemalloc.start()
+    items = [make(i) for i in range(n)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    return size / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--n', type=int, default=1_000_000)
+    args = parser.parse_args()
+    n = args.n
+    Result = record_type(['loss', 'acc', 'epoch'], 'Result')
+
+    timed('dotdict(...)', lambda: [dotdict(loss=i, acc=0.5, epoch=1)
+                                   for i in range(n)], n)
+    timed('Result(...)', lambda: [Result(i, 0.5, 1) for i in range(n)], n)
+    timed('record(dict)', lambda: [record({'loss': i, 'acc': 0.5, 'epoch': 1})
+                                   for i in range(n)], n)
+
+    d = dotdict(loss=1.0, acc=0.5, epoch=1)
+    r = Result(1.0, 0.5, 1)
+    timed('dotdict attribute read', lambda: [d.loss for _ in range(n)], n)
+    timed('Record attribute read', lambda: [r.loss for _ in range(n)], n)
+
+    cfg = {'model': {'encoder': {'depth': 4}}}
+    dd = dotdict(model=dotdict(encoder=dotdict(depth=4)))
+    rr = record(cfg)
+    timed('dotdict nested read', lambda: [dd.model.encoder.depth
+                                          for _ in range(n)], n)
+    timed('Record nested read', lambda: [rr.model.encoder.depth
+                                         for _ in range(n)], n)
+
+    m = min(n, 100_000)
+    for label, make in [
+            ('dotdict', lambda i: dotdict(loss=i, acc=0.5, epoch=1)),
+            ('Record', lambda i: Result(i, 0.5, 1))]:
+        print(f'{label + " memory":<28}: '
+              f'{memory_per_instance(make, m):8.1f} bytes/instance')
+
+
+if __name__ == '__main__':
+    main()
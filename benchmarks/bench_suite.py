@@ -0,0 +1,235 @@
+"""
+Benchmark jburt hot paths across increasing input sizes.
+
+Each case is timed over several rounds, and its peak traced memory is
+measured in a separate run. Results can be written to JSON and compared
+against a baseline: the exit status is 1 if any time or peak memory grew
+by more than the threshold. Times under 10 ms are noisier, so they are
+allowed to grow by --small-threshold instead, and a time regression is only
+reported if it is confirmed by measuring the case again.
+
+Usage:
+    python benchmarks/bench_suite.py [--quick] [--cases pearsonr_multi ...]
+                                     [--json out.json] [--baseline base.json]
+                                     [--threshold 0.25]
+                                     [--small-threshold 0.5]
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from jburt.file import count_lines
+from jburt.mask import mask_nan
+from jburt.math import find_outliers
+from jburt.matrix import find_diagonal_blocks
+from jburt.signal import fwhm_spline
+from jburt.stats import pearsonr_multi
+from jburt.stats import spearmanr_multi
+
+
+def setup_corr(n, tmp):
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((n, 500)), rng.standard_normal((n, 500))
+
+
+def setup_outliers(n, tmp):
+    rng = np.random.default_rng(0)
+    scores = rng.standard_normal(n)
+    scores[::100] *= 20
+    return (scores,)
+
+
+def setup_blocks(n, tmp):
+    mat = np.zeros((n, n), dtype=int)
+    start = 0
+    for size in np.random.default_rng(0).integers(1, 20, n):
+        mat[start:start + size, start:start + size] = 1
+        start += size
+        if start >= n:
+            break
+    return (mat,)
+
+
+def setup_fwhm(n, tmp):
+    x = np.linspace(-5, 5, n)
+    return (np.exp(-x ** 2),)
+
+
+def setup_count_lines(n, tmp):
+    path = tmp / f'lines_{n}.txt'
+    if not path.exists():
+        path.write_bytes(b'lorem ipsum dolor sit amet, consectetur\n' * n)
+    return (path,)
+
+
+def setup_mask_nan(n, tmp):
+    rng = np.random.default_rng(0)
+    arrays = [rng.standard_normal(n) for _ in range(3)]
+    for a in arrays:
+        a[rng.integers(0, n, n // 10)] = np.nan
+    return (arrays,)
+
+
+# name -> (function, setup(n, tmpdir) -> args, sizes, quick sizes)
+CASES = {
+    'pearsonr_multi': (pearsonr_multi, setup_corr,
+                       [100, 400, 1600], [100, 400]),
+    'spearmanr_multi': (spearmanr_multi, setup_corr,
+                        [100, 400, 1600], [100, 400]),
+    'find_outliers': (find_outliers, setup_outliers,
+                      [10_000, 100_000, 300_000], [10_000, 100_000]),
+    'find_diagonal_blocks': (find_diagonal_blocks, setup_blocks,
+                             [100, 200, 400], [100, 200]),
+    'fwhm_spline': (fwhm_spline, setup_fwhm,
+                    [100, 1_000, 10_000], [100, 1_000]),
+    'count_lines': (count_lines, setup_count_lines,
+                    [100_000, 1_000_000, 4_000_000], [100_000, 1_000_000]),
+    'mask_nan': (mask_nan, setup_mask_nan,
+                 [100_000, 1_000_000, 10_000_000], [100_000, 1_000_000]),
+}
+
+
+def time_rounds(func, args, repeat, min_time=0.1):
+    """Time per call in each of `repeat` rounds of at least `min_time`."""
+    func(*args)  # warm up caches and lazy imports
+    rounds = []
+    for _ in range(repeat):
+        calls = 0
+        t0 = time.perf_counter()
+        while True:
+            func(*args)
+            calls += 1
+            elapsed = time.perf_counter() - t0
+            if elapsed >= min_time:
+                break
+        rounds.append(elapsed / calls)
+    return rounds
+
+
+def peak_memory(func, args):
+    """Peak memory traced by tracemalloc during one call, in bytes."""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        func(*args)
+        return tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+
+def scaling_exponent(sizes, times):
+    """Slope of log(time) against log(size)."""
+    if len(sizes) < 2:
+        return float('nan')
+    return float(np.polyfit(np.log(sizes), np.log(times), 1)[0])
+
+
+def compare(results, baseline, threshold, small_threshold, small_time=0.01):
+    """(name, size, key) of each regression of `results` relative to
+    `baseline`. Times below `small_time` seconds are held to
+    `small_threshold`."""
+    regressions = []
+    for name, by_size in results.items():
+        for size, entry in by_size.items():
+            old = baseline.get(name, {}).get(size)
+            if old is None:
+                continue
+            for key in ('time_s', 'peak_bytes'):
+                limit = threshold
+                if key == 'time_s' and old[key] < small_time:
+                    limit = max(threshold, small_threshold)
+                if old[key] > 0 and entry[key] > old[key] * (1 + limit):
+                    regressions.append((name, size, key))
+    return regressions
+
+
+def run(args, tmp):
+    """Run the selected cases, printing and returning their results."""
+    results = {}
+    for name in args.cases:
+        func, setup, sizes, quick_sizes = CASES[name]
+        sizes = quick_sizes if args.quick else sizes
+        results[name] = {}
+        times = []
+        for n in sizes:
+            fargs = setup(n, tmp)
+            # noise only ever adds time, so the best round is the most
+            # repeatable statistic; the median is recorded for reference
+            rounds = time_rounds(func, fargs, args.repeat)
+            t = min(rounds)
+            peak = peak_memory(func, fargs)
+            results[name][str(n)] = {'time_s': t,
+                                     'time_median_s': statistics.median(rounds),
+                                     'peak_bytes': peak}
+            times.append(t)
+            print(f'{name:<22} n={n:<10} {t * 1000:10.3f} ms '
+                  f'{peak / 2 ** 20:10.2f} MB peak')
+        print(f'{name:<22} scaling exponent {scaling_exponent(sizes, times):.2f}')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES),
+                        default=list(CASES))
+    parser.add_argument('--quick', action='store_true',
+                        help='smaller sizes, for a fast local check')
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--baseline', help='compare against this results file')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed relative increase before a regression '
+                             'is reported (default 0.25)')
+    parser.add_argument('--small-threshold', type=float, default=0.5,
+                        help='allowed relative increase for times under '
+                             '10 ms (default 0.5)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='jburt-bench-') as tmp:
+        results = run(args, Path(tmp))
+        regressions = []
+        if args.baseline:
+            with open(args.baseline) as f:
+                baseline = json.load(f)['results']
+            regressions = compare(results, baseline, args.threshold,
+                                  args.small_threshold)
+            # re-time suspects once, to filter out transient machine noise
+            for name, size, key in regressions:
+                if key == 'time_s':
+                    func, setup = CASES[name][:2]
+                    entry = results[name][size]
+                    entry['time_s'] = min(entry['time_s'], *time_rounds(
+                        func, setup(int(size), Path(tmp)), args.repeat))
+            regressions = compare(results, baseline, args.threshold,
+                                  args.small_threshold)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'meta': {'python': platform.python_version(),
+                                'numpy': np.__version__,
+                                'machine': platform.platform(),
+                                'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+                       'results': results}, f, indent=2)
+
+    if args.baseline:
+        for name, size, key in regressions:
+            old, new = baseline[name][size][key], results[name][size][key]
+            print(f'REGRESSION {name}[n={size}] {key}: {old:.4g} -> '
+                  f'{new:.4g} (+{new / old - 1:.0%})')
+        if regressions:
+            sys.exit(1)
+        print(f'no regressions beyond {args.threshold:.0%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Async chat server: /get streams the reply as server-sent events, and many
+clients are served concurrently on one event loop.
+
+    python async_index.py                     # development
+    hypercorn async_index:app -b localhost:8080 -w 4
+"""
+
+import asyncio
+import os
+
+from quart import Quart
+from quart import Response
+from quart import render_template
+from quart import request
+
+from index import respond
+
+app = Quart(__name__)
+
+# simulated per-token generation latency of the stub responder, in seconds
+TOKEN_DELAY = float(os.environ.get("STUB_TOKEN_DELAY", "0.02"))
+
+
+async def stream_reply(query: str):
+    """Yield the stub reply word by word, as a language model would."""
+    words = respond(query).split(" ")
+    for i, word in enumerate(words):
+        await asyncio.sleep(TOKEN_DELAY)
+        yield word if i == len(words) - 1 else word + " "
+
+
+def sse(data: str, event: str = None) -> bytes:
+    """Encode one server-sent event."""
+    lines = [f"event: {event}"] if event else []
+    lines += [f"data: {line}" for line in data.split("\n")]
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+@app.route("/")
+async def home():
+    return await render_template("index.html", stream=True)
+
+
+@app.route("/get")
+async def get_bot_response():
+    query = request.args.get("msg", "")
+
+    async def events():
+        async for token in stream_reply(query):
+            yield sse(token)
+        yield sse("", event="end")
+
+    return Response(
+        events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+if __name__ == "__main__":
+    app.run(host="localhost", port=8080)
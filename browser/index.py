@@ -5,6 +5,11 @@ from flask import request
 app = Flask(__name__)
 
 
+def respond(query: str) -> str:
+    """Stub responder shared by the sync and async servers."""
+    return f"{query}? what a dumb question! lmao"
+
+
 @app.route("/")
 def home():
     return render_template("index.html")
@@ -13,8 +18,7 @@ def home():
 @app.route("/get")
 def get_bot_response():
     query = request.args.get("msg")
-    response = f"{query}? what a dumb question! lmao"
-    return response
+    return respond(query)
 
 
 if __name__ == "__main__":
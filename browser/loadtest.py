@@ -0,0 +1,154 @@
+"""
+Load-test the chat server with many concurrent clients.
+
+Each client sends requests to /get back to back and reads the whole
+response (plain text or server-sent events). Reports time to the first
+event with data (or first body byte), total latency percentiles and
+throughput.
+
+Usage:
+    python async_index.py &   # or: python index.py
+    python loadtest.py [--url http://localhost:8080] [--clients 50]
+                       [--requests 500]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import urllib.parse
+
+
+def percentile(values, q):
+    """q-th percentile (0-100) of values, by linear interpolation."""
+    values = sorted(values)
+    if len(values) == 1:
+        return values[0]
+    pos = (len(values) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+async def read_body(reader, headers):
+    """Yield the response body as it arrives, undoing chunked encoding."""
+    if b"transfer-encoding: chunked" not in headers.lower():
+        while data := await reader.read(65536):
+            yield data
+        return
+    while True:
+        size = int((await reader.readline()).split(b";", 1)[0], 16)
+        if size == 0:
+            return
+        yield (await reader.readexactly(size + 2))[:-2]
+
+
+def first_event(buffer):
+    """True once `buffer` holds a complete `data:` line with content."""
+    for line in buffer.split(b"\n")[:-1]:  # the last line may be partial
+        line = line.rstrip(b"\r")
+        if line.startswith(b"data:") and line[5:].removeprefix(b" "):
+            return True
+    return False
+
+
+async def fetch(host, port, path):
+    """GET `path` over a new connection; return (ttfb, latency) in seconds.
+
+    For server-sent events, ttfb is the time to the first event with
+    non-empty data, not to the headers, which a streaming server sends
+    before any reply is generated. For other responses it is the time to
+    the first byte of the body.
+    """
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+            "Accept: text/event-stream\r\nConnection: close\r\n\r\n".encode()
+        )
+        await writer.drain()
+        try:
+            headers = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            raise ConnectionError("empty response" if not e.partial
+                                  else "incomplete headers") from None
+        status = headers.split(b"\r\n", 1)[0]
+        if b" 200 " not in status:
+            raise ConnectionError(status.decode(errors="replace"))
+        sse = b"content-type: text/event-stream" in headers.lower()
+        ttfb, buffer = None, b""
+        async for data in read_body(reader, headers):
+            if ttfb is not None or not data:
+                continue
+            if not sse:
+                ttfb = time.perf_counter() - start
+                continue
+            buffer = buffer[buffer.rfind(b"\n") + 1:] + data  # keep partial line
+            if first_event(buffer):
+                ttfb = time.perf_counter() - start
+        latency = time.perf_counter() - start
+    finally:
+        writer.close()
+    if ttfb is None:
+        raise ConnectionError("no data in response")
+    return ttfb, latency
+
+
+async def client(host, port, queue, ttfbs, latencies, errors):
+    while True:
+        try:
+            i = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        path = "/get?" + urllib.parse.urlencode({"msg": f"question {i}"})
+        try:
+            ttfb, latency = await fetch(host, port, path)
+        except (OSError, ConnectionError) as e:
+            errors.append(str(e))
+            continue
+        ttfbs.append(ttfb)
+        latencies.append(latency)
+
+
+async def run(url, clients, requests):
+    parts = urllib.parse.urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(i)
+    ttfbs, latencies, errors = [], [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, queue, ttfbs, latencies, errors)
+                           for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    return ttfbs, latencies, errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    ttfbs, latencies, errors, elapsed = asyncio.run(
+        run(args.url, args.clients, args.requests))
+
+    print(f"clients      {args.clients}")
+    print(f"requests     {len(latencies)} ok, {len(errors)} failed")
+    print(f"elapsed      {elapsed:.2f} s")
+    print(f"throughput   {len(latencies) / elapsed:.1f} req/s")
+    if not latencies:
+        if errors:
+            print(f"first error  {errors[0]}")
+        return
+    for name, values in (("ttfb", ttfbs), ("latency", latencies)):
+        ms = [v * 1000 for v in values]
+        print(f"{name:<12} mean {statistics.mean(ms):8.1f} ms  "
+              + "  ".join(f"p{q} {percentile(ms, q):8.1f} ms"
+                          for q in (50, 90, 99)))
+
+
+if __name__ == "__main__":
+    main()
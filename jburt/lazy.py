@@ -0,0 +1,69 @@
+"""
+Deferred imports of heavy dependencies.
+"""
+
+import importlib
+import sys
+import types
+
+__all__ = ["LazyModule", "lazy_import"]
+
+
+class LazyModule(types.ModuleType):
+    """
+    Module proxy that imports the real module on first attribute access.
+
+    Parameters
+    ----------
+    name : str
+        fully qualified module name, e.g. 'matplotlib.pyplot'
+
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        # only reached for attributes not found on the proxy itself
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Import a module lazily.
+
+    Parameters
+    ----------
+    name : str
+        fully qualified module name
+
+    Returns
+    -------
+    module or LazyModule
+        the module itself if it has already been imported, otherwise a proxy
+        that imports it on first attribute access
+
+    Usage:
+    >>> plt = lazy_import("matplotlib.pyplot")  # nothing imported yet
+    >>> fig, ax = plt.subplots()  # matplotlib.pyplot imported here
+
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
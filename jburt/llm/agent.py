@@ -1,9 +1,80 @@
+import asyncio
+import time
+import weakref
 from collections import deque
-import openai
+
+from ..lazy import lazy_import
+from ..text.split import count_tokens
+
+openai = lazy_import("openai")
+
+
+class TokenBudgetHistory:
+    """Conversation history trimmed to a token budget.
+
+    The system prompt is pinned. Each message's token count is computed once,
+    when it is appended, and a running total is kept, so appending and
+    trimming are O(1) amortized. When the total exceeds `max_tokens`, the
+    oldest turns (a user message and the replies to it) are dropped whole.
+    The newest turn is always kept, even if it alone exceeds the budget.
+
+    Usage:
+    >>> history = TokenBudgetHistory({"role": "system", "content": "..."}, 3000)
+    >>> history.append({"role": "user", "content": "hi"})
+    >>> messages = list(history)
+
+    """
+
+    per_message = 4  # role and formatting overhead per message
+
+    def __init__(self, system: dict, max_tokens: int = 3000, encoding="cl100k_base"):
+        self.system = system
+        self.max_tokens = max_tokens
+        self.encoding = encoding
+        self._turns = deque()
+        self._users = 0  # user messages in _turns, i.e. turns
+        self.tokens = self._count(system)
+
+    def _count(self, message: dict) -> int:
+        return count_tokens(message["content"] or "", self.encoding) + self.per_message
+
+    def append(self, message: dict) -> None:
+        n = self._count(message)
+        self._turns.append((message, n))
+        self.tokens += n
+        if message["role"] == "user":
+            self._users += 1
+        # drop the oldest turn while it is not the newest one
+        while self.tokens > self.max_tokens and (
+                self._users > 1
+                or (self._users == 1 and self._turns[0][0]["role"] != "user")):
+            message, n = self._turns.popleft()
+            self.tokens -= n
+            if message["role"] == "user":
+                self._users -= 1
+            while self._turns and self._turns[0][0]["role"] != "user":
+                self.tokens -= self._turns.popleft()[1]
+
+    def pop(self) -> dict:
+        """Remove and return the newest message. Turns dropped to make room
+        for it are not restored."""
+        message, n = self._turns.pop()
+        self.tokens -= n
+        if message["role"] == "user":
+            self._users -= 1
+        return message
+
+    def __iter__(self):
+        yield self.system
+        for message, _ in self._turns:
+            yield message
+
+    def __len__(self) -> int:
+        return 1 + len(self._turns)
 
 
 class Chatbot:
-    """Front-end for chat with rolling history buffer.
+    """Front-end for chat with a token-budgeted history buffer.
 
     Usage:
     >>> model = Chatbot(system="you are a helpful assistant.\n---\n")
@@ -15,22 +86,45 @@ class Chatbot:
     system = "you are an expert machine learning engineer and communicator.\n---\n"
     params = {"temperature": 0.0, "max_tokens": 128, "stream": False, "model": model}
 
-    max_convo_length = 6
+    # token budget for the prompt history; see TokenBudgetHistory
+    history_tokens = 3000
+
+    # opt-in ResponseCache; only deterministic (temperature 0) calls are cached
+    cache = None
 
     @staticmethod
     def send_receive(messages, **kwargs) -> dict:
         if not all(isinstance(m, dict) for m in messages):
             raise ValueError("messages must be a list of dictionaries")
-        response = Agent.client.chat.completions.create(
-            messages=list(messages), **(Agent.params | (kwargs or {}))
+        request = Chatbot.params | (kwargs or {})
+        key = None
+        if Chatbot.cache is not None and request.get("temperature") == 0:
+            key = Chatbot.cache.key(messages=list(messages), **request)
+            cached = Chatbot.cache.get(key)
+            if cached is not None:
+                return cached
+        response = Chatbot.get_client().chat.completions.create(
+            messages=list(messages), **request
         )
-        return {"role": "system", "content": response.choices[0].message.content}
+        result = {"role": "system", "content": response.choices[0].message.content}
+        if key is not None:
+            Chatbot.cache.put(key, result)
+        return result
 
-    client = openai.OpenAI()
-    messages = deque(maxlen=max_convo_length)
+    client = None
 
-    def __init__(self, system=None) -> None:
-        self.messages = [{"role": "system", "content": system or self.system}]
+    @classmethod
+    def get_client(cls):
+        """Shared OpenAI client, constructed on first use."""
+        if Chatbot.client is None:
+            Chatbot.client = openai.OpenAI()
+        return Chatbot.client
+
+    def __init__(self, system=None, history_tokens=None) -> None:
+        self.messages = TokenBudgetHistory(
+            {"role": "system", "content": system or self.system},
+            history_tokens or self.history_tokens,
+        )
 
     def __call__(self, content: str) -> str:
         self.messages.append({"role": "user", "content": content})
@@ -44,6 +138,164 @@ class Chatbot:
         return list(self.messages)
 
 
+class RateLimiter:
+    """Async token bucket: at most `rate` acquisitions per second on average,
+    with bursts of up to `burst`.
+
+    Usage:
+    >>> limiter = RateLimiter(rate=10)
+    >>> await limiter.acquire()
+
+    """
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._last) * self.rate
+                )
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AsyncChatbot:
+    """Async front-end for chat that streams replies token by token.
+
+    All instances running on the same event loop share one AsyncOpenAI
+    client (and so one pool of HTTP connections) unless a client is passed
+    in; a client's connections cannot outlive the loop that opened them,
+    so each loop gets its own. Instances may also share a
+    semaphore and a `RateLimiter` to bound load across many concurrent
+    conversations; see `run_conversations`.
+
+    Usage:
+    >>> model = AsyncChatbot(system="you are a helpful assistant.\n---\n")
+    >>> async for token in model.stream("What is the capital of France?"):
+    ...     print(token, end="")
+
+    """
+
+    model = Chatbot.model
+    system = Chatbot.system
+    params = Chatbot.params | {"stream": True}
+
+    client = None  # if set, used on every loop instead of per-loop clients
+    _loop_clients = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def get_client(cls):
+        """AsyncOpenAI client shared on the running event loop, constructed
+        on first use there."""
+        if AsyncChatbot.client is not None:
+            return AsyncChatbot.client
+        loop = asyncio.get_running_loop()
+        client = AsyncChatbot._loop_clients.get(loop)
+        if client is None:
+            client = AsyncChatbot._loop_clients[loop] = openai.AsyncOpenAI()
+        return client
+
+    history_tokens = Chatbot.history_tokens
+
+    def __init__(
+        self, system=None, client=None, semaphore=None, limiter=None, history_tokens=None
+    ) -> None:
+        self.messages = TokenBudgetHistory(
+            {"role": "system", "content": system or self.system},
+            history_tokens or self.history_tokens,
+        )
+        self._client = client
+        self.semaphore = semaphore
+        self.limiter = limiter
+
+    async def send_receive_stream(self, messages, **kwargs):
+        """Yield the content of a reply to `messages` as it is generated."""
+        if not all(isinstance(m, dict) for m in messages):
+            raise ValueError("messages must be a list of dictionaries")
+        client = self._client or AsyncChatbot.get_client()
+        if self.semaphore is not None:
+            await self.semaphore.acquire()
+        try:
+            if self.limiter is not None:
+                await self.limiter.acquire()
+            stream = await client.chat.completions.create(
+                messages=list(messages), **(self.params | kwargs)
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            if self.semaphore is not None:
+                self.semaphore.release()
+
+    async def stream(self, content: str, **kwargs):
+        """Send `content` and yield the reply incrementally; the full reply
+        is added to the history once the stream ends. If the stream fails
+        or is abandoned, `content` is removed from the history again."""
+        self.messages.append({"role": "user", "content": content})
+        parts = []
+        try:
+            async for token in self.send_receive_stream(self.messages, **kwargs):
+                parts.append(token)
+                yield token
+        except BaseException:
+            self.messages.pop()  # no reply was recorded for it
+            raise
+        self.messages.append({"role": "assistant", "content": "".join(parts)})
+
+    async def __call__(self, content: str, **kwargs) -> str:
+        return "".join([token async for token in self.stream(content, **kwargs)])
+
+    def get_convo(self) -> list:
+        return list(self.messages)
+
+
+async def run_conversations(
+    conversations, system=None, concurrency=32, rate=None, client=None, on_token=None
+) -> list:
+    """Run many multi-turn conversations concurrently.
+
+    Args:
+        conversations (list[list[str]]): User turns of each conversation.
+        system (str, optional): System prompt for every conversation.
+        concurrency (int, optional): Maximum requests in flight. Defaults to 32.
+        rate (float, optional): Maximum requests started per second.
+        client (openai.AsyncOpenAI, optional): Client to use instead of the
+            shared one, e.g. pointed at a local mock server via base_url.
+        on_token (callable, optional): Called as on_token(i, token) for each
+            streamed token of conversation i.
+
+    Returns:
+        list[list[str]]: Replies of each conversation.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rate, burst=concurrency) if rate else None
+
+    async def _run(i, turns):
+        bot = AsyncChatbot(system, client=client, semaphore=semaphore, limiter=limiter)
+        replies = []
+        for turn in turns:
+            parts = []
+            async for token in bot.stream(turn):
+                parts.append(token)
+                if on_token is not None:
+                    on_token(i, token)
+            replies.append("".join(parts))
+        return replies
+
+    return await asyncio.gather(*(_run(i, c) for i, c in enumerate(conversations)))
+
+
 if __name__ == "__main__":
     llm = Chatbot(system="you are a helpful assistant.\n---\n")
     print(llm("What is the capital of France?"))
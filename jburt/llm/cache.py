@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# the total size of stored responses is kept in `meta` by triggers, in the
+# same transaction as each change, so it is never recomputed with SUM after
+# the database is first set up
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS responses ("
+    "key TEXT PRIMARY KEY, value TEXT, size INTEGER, accessed REAL)",
+    "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)",
+    "INSERT INTO meta SELECT 'size', "
+    "(SELECT COALESCE(SUM(size), 0) FROM responses) "
+    "WHERE NOT EXISTS (SELECT 1 FROM meta WHERE key = 'size')",
+    "CREATE TRIGGER IF NOT EXISTS responses_insert AFTER INSERT ON responses "
+    "BEGIN UPDATE meta SET value = value + new.size WHERE key = 'size'; END",
+    "CREATE TRIGGER IF NOT EXISTS responses_update "
+    "AFTER UPDATE OF size ON responses BEGIN UPDATE meta "
+    "SET value = value + new.size - old.size WHERE key = 'size'; END",
+    "CREATE TRIGGER IF NOT EXISTS responses_delete AFTER DELETE ON responses "
+    "BEGIN UPDATE meta SET value = value - old.size WHERE key = 'size'; END",
+)
+
+
+class ResponseCache:
+    """Persistent, size-bounded LRU cache of chat responses in SQLite.
+
+    Safe to share between threads and between processes: each process opens
+    its own connection, the database runs in WAL mode, and writers wait on
+    locks rather than failing. When the total size of stored responses
+    exceeds `max_bytes`, the least recently used entries are evicted.
+
+    Usage:
+    >>> Chatbot.cache = ResponseCache("~/.cache/jburt/chat.sqlite")
+    >>> Chatbot("What is the capital of France?")  # miss: calls the API
+    >>> Chatbot.cache.hits, Chatbot.cache.misses
+
+    """
+
+    def __init__(self, path, max_bytes: int = 256 * 1024 * 1024) -> None:
+        self.path = os.path.expanduser(str(path))
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # connections must not be shared with forked children
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for statement in _SCHEMA:
+                    conn.execute(statement)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    @staticmethod
+    def key(**request) -> str:
+        """Hash of a request (model, params and messages)."""
+        blob = json.dumps(request, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """Cached response for `key`, or None."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.conn.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key)
+            )
+        return json.loads(row[0])
+
+    def put(self, key: str, value) -> None:
+        """Store a JSON-serializable response, evicting old entries if needed."""
+        blob = json.dumps(value)
+        with self._lock:
+            conn = self.conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # an upsert rather than INSERT OR REPLACE, whose implicit
+                # delete would not fire the size trigger
+                conn.execute(
+                    "INSERT INTO responses VALUES (?, ?, ?, ?) ON CONFLICT (key) "
+                    "DO UPDATE SET value = excluded.value, size = excluded.size, "
+                    "accessed = excluded.accessed",
+                    (key, blob, len(blob), time.time()),
+                )
+                total = conn.execute(
+                    "SELECT value FROM meta WHERE key = 'size'"
+                ).fetchone()[0]
+                if total > self.max_bytes:
+                    self._evict(conn, total - self.max_bytes)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _evict(conn: sqlite3.Connection, excess: int) -> None:
+        rows = conn.execute("SELECT key, size FROM responses ORDER BY accessed")
+        doomed = []
+        for key, size in rows:
+            if excess <= 0:
+                break
+            doomed.append((key,))
+            excess -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
@@ -2,44 +2,482 @@
 Utilities related to logging and IO.
 """
 
+import atexit
+import functools
+import json
+import logging
+import os
 import sys
+import threading
+import time
+import tracemalloc
+from typing import Callable
+from typing import List
+from typing import Optional
+
+
+class BackgroundWriter(object):
+    """
+    Hand writes off to a background thread, which passes them to `sink` in
+    batches.
+
+    A batch is flushed when it reaches `max_bytes` characters, when
+    `interval` seconds have passed since its first item, and on `flush`.
+    Errors raised by `sink` are re-raised by the next `flush` or `close`.
+
+    Parameters
+    ----------
+    sink : Callable[[List[str]], None]
+        called in the writer thread with each batch of items
+    interval : float, default 0.2
+        maximum time an item is held before being flushed, in seconds
+    max_bytes : int, default 64 KB
+        flush once this many characters are buffered
+
+    Usage:
+    >>> with BackgroundWriter(lambda batch: f.write("".join(batch))) as w:
+    ...     w.write("hello\\n")
+
+    """
+
+    def __init__(self, sink: Callable[[List[str]], None], interval: float = 0.2,
+                 max_bytes: int = 1 << 16):
+        self.sink = sink
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending: List[str] = []
+        self._size = 0
+        self._waiters: List[threading.Event] = []
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="BackgroundWriter")
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self) -> None:
+        while True:
+            # sleep until something is written, then give the batch up to
+            # `interval` to fill unless it is already urgent
+            self._wakeup.wait()
+            self._wakeup.clear()
+            with self._lock:
+                urgent = (self._size >= self.max_bytes or self._waiters
+                          or self._closed)
+            if not urgent:
+                self._wakeup.wait(self.interval)
+                self._wakeup.clear()
+            with self._lock:
+                batch, self._pending, self._size = self._pending, [], 0
+                waiters, self._waiters = self._waiters, []
+                stopping = self._closed
+            if batch and self._error is None:
+                try:
+                    self.sink(batch)
+                except BaseException as e:
+                    self._error = e
+            for done in waiters:
+                done.set()
+            if stopping:
+                return
+
+    def _raise(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def write(self, data: str) -> None:
+        if not data:
+            return
+        with self._lock:
+            if self._closed:
+                raise ValueError("write to closed BackgroundWriter")
+            first = not self._pending
+            self._pending.append(data)
+            self._size += len(data)
+            full = self._size >= self.max_bytes
+        if first or full:
+            self._wakeup.set()
+
+    def flush(self) -> None:
+        """Block until everything written so far has been passed to `sink`."""
+        done = threading.Event()
+        with self._lock:
+            if self._closed:
+                done = None
+            else:
+                self._waiters.append(done)
+        if done is not None:
+            self._wakeup.set()
+            done.wait()
+        self._raise()
+
+    def close(self) -> None:
+        """Drain pending writes and stop the writer thread."""
+        with self._lock:
+            closing = not self._closed
+            self._closed = True
+        if closing:
+            atexit.unregister(self.close)
+            self._wakeup.set()
+            self._thread.join()
+        self._raise()
 
 
 class Tee(object):
     """
+    Copy everything written to stdout to a file.
+
+    Writes are handed to a background thread and flushed to both the file and
+    the original stdout in batches; `flush` blocks until they are written.
+    Closing (or leaving the `with` block) drains pending writes and restores
+    stdout.
+
+    Parameters
+    ----------
+    fname : str
+        output file
+    mode : str, default 'w'
+        file mode
+    background : bool, default True
+        write from a background thread; if False, write synchronously
+    interval : float, default 0.2
+        maximum delay before buffered output is written, in seconds
+
+    Usage:
+    >>> with Tee("train.log"):
+    ...     print("epoch 1")
+
     https://stackoverflow.com/a/616686
     """
 
-    def __init__(self, fname, mode="w"):
+    def __init__(self, fname, mode="w", background=True, interval=0.2):
         self.file = open(fname, mode)
         self.stdout = sys.stdout
+        self.writer = BackgroundWriter(self._write_batch, interval) if background else None
         sys.stdout = self
+        atexit.register(self.close)  # runs before the writer's own hook
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
     def __del__(self):
-        sys.stdout = self.stdout
-        self.file.close()
+        if hasattr(self, "writer"):
+            self.close()
 
-    def write(self, data):
+    def _write_batch(self, batch):
+        data = "".join(batch)
         self.file.write(data)
         self.stdout.write(data)
 
+    def write(self, data):
+        if self.writer is not None:
+            self.writer.write(data)
+        else:
+            self._write_batch([data])
+
     def flush(self):
+        if self.writer is not None:
+            self.writer.flush()
         self.file.flush()
+        self.stdout.flush()
+
+    def close(self):
+        if self.file.closed:
+            return
+        atexit.unregister(self.close)
+        if sys.stdout is self:
+            sys.stdout = self.stdout
+        try:
+            if self.writer is not None:
+                self.writer.close()
+        finally:
+            self.file.close()
 
 
 class StreamToLogger(object):
     """
     Psuedo file-like stream object that redirects writes to a logger instance.
+
+    Text is buffered until a newline, so each log record holds whole lines
+    however the text was split across writes. `flush` logs any trailing
+    partial line.
+
+    Parameters
+    ----------
+    logger : logging.Logger
+    level : int
+        logging level of the records
+    background : bool, default False
+        log from a background thread. records are then timestamped when they
+        are handed to the logger, up to `interval` seconds after the write
+    interval : float, default 0.2
+        maximum delay before buffered lines are logged, in seconds
+
     """
 
-    def __init__(self, logger, level):
+    def __init__(self, logger, level, background=False, interval=0.2):
         self.logger = logger
         self.level = level
         self.linebuf = ""
+        self.writer = BackgroundWriter(self._log_lines, interval) if background else None
+        if self.writer is not None:
+            atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _log_lines(self, lines):
+        for line in lines:
+            self.logger.log(self.level, line)
+
+    def _emit(self, line):
+        line = line.rstrip()
+        if not line:
+            return
+        if self.writer is not None:
+            self.writer.write(line)
+        else:
+            self.logger.log(self.level, line)
 
     def write(self, buf):
-        for line in buf.rstrip().splitlines():
-            self.logger.log(self.level, line.rstrip())
+        lines = (self.linebuf + buf).split("\n")
+        self.linebuf = lines.pop()
+        for line in lines:
+            self._emit(line)
 
     def flush(self):
-        pass
+        if self.linebuf:
+            self._emit(self.linebuf)
+            self.linebuf = ""
+        if self.writer is not None:
+            self.writer.flush()
+
+    def close(self):
+        self.flush()
+        if self.writer is not None:
+            atexit.unregister(self.close)
+            self.writer.close()
+
+
+PROFILE_ENV = "JBURT_PROFILE"
+PROFILE_OUT_ENV = "JBURT_PROFILE_OUT"
+
+
+class Profiler(object):
+    """
+    Thread-safe registry of call counts, wall time and peak allocations,
+    filled by `profiled` functions and `profile` blocks.
+
+    The module-level `profiler` is enabled by the JBURT_PROFILE environment
+    variable: '1' records counts and times, 'mem' also records peak memory
+    allocated during each call with tracemalloc (which slows Python code
+    down considerably). If JBURT_PROFILE_OUT names a file, a JSON summary is
+    written there at exit.
+
+    Peak memory is an upper bound. tracemalloc counts allocations from all
+    threads, and its peak is only reset when no block is open, so a block
+    that overlaps others (nested, or on another thread) reports the highest
+    memory use seen since the earliest of them started, relative to its
+    own starting point.
+
+    Usage:
+    $ JBURT_PROFILE=1 python pipeline.py
+    >>> from jburt.log import profiler
+    >>> profiler.log_summary()
+
+    """
+
+    def __init__(self, enabled: bool = False, memory: bool = False):
+        self.enabled = enabled
+        self.memory = memory
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._mem_lock = threading.Lock()
+        self._open = 0  # memory-profiled blocks open on any thread
+
+    @classmethod
+    def from_env(cls) -> "Profiler":
+        mode = os.environ.get(PROFILE_ENV, "").strip().lower()
+        enabled = mode not in ("", "0", "false", "no", "off")
+        return cls(enabled=enabled, memory=mode == "mem")
+
+    def enable(self, memory: bool = False) -> None:
+        """Enable recording. Functions decorated while disabled stay
+        uninstrumented."""
+        self.enabled = True
+        self.memory = memory
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def record(self, name: str, elapsed: float,
+               peak: Optional[int] = None) -> None:
+        with self._lock:
+            entry = self._stats.get(name)
+            if entry is None:
+                entry = self._stats[name] = [0, 0.0, 0.0, None]
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] = max(entry[2], elapsed)
+            if peak is not None:
+                entry[3] = peak if entry[3] is None else max(entry[3], peak)
+
+    def _mem_enter(self) -> int:
+        # tracemalloc's peak is process-wide, so it is only reset when no
+        # block is open on any thread; otherwise a reset would lose the peak
+        # another open block is measuring
+        with self._mem_lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            if self._open == 0:
+                tracemalloc.reset_peak()
+            self._open += 1
+            return tracemalloc.get_traced_memory()[0]
+
+    def _mem_exit(self, start: int) -> int:
+        with self._mem_lock:
+            self._open -= 1
+            return tracemalloc.get_traced_memory()[1] - start
+
+    def summary(self, sort: str = "total_s") -> dict:
+        """
+        Stats per name, ordered by `sort` (descending).
+
+        Returns
+        -------
+        dict
+            name -> {calls, total_s, mean_s, max_s[, peak_bytes]}
+        """
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._stats.items()]
+        out = {}
+        for name, (calls, total, longest, peak) in items:
+            entry = dict(calls=calls, total_s=total, mean_s=total / calls,
+                         max_s=longest)
+            if peak is not None:
+                entry["peak_bytes"] = peak
+            out[name] = entry
+        return dict(sorted(out.items(), key=lambda kv: -kv[1].get(sort, 0)))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def to_json(self, path=None) -> str:
+        """Summary as JSON, also written to `path` if given."""
+        text = json.dumps(self.summary(), indent=2)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+    def log_summary(self, logger: Optional[logging.Logger] = None,
+                    level: int = logging.INFO, top: Optional[int] = None
+                    ) -> None:
+        """Log one line per name, slowest (by total time) first."""
+        logger = logger or logging.getLogger(__name__)
+        for name, s in list(self.summary().items())[:top]:
+            line = (f"{name}: {s['calls']} calls, {s['total_s']:.4f} s total, "
+                    f"{s['mean_s'] * 1e3:.3f} ms mean, "
+                    f"{s['max_s'] * 1e3:.3f} ms max")
+            if "peak_bytes" in s:
+                line += f", {s['peak_bytes'] / 2 ** 20:.2f} MB peak"
+            logger.log(level, line)
+
+
+profiler = Profiler.from_env()
+
+
+class profile(object):
+    """
+    Context manager recording the time (and, in memory mode, peak
+    allocations) of a block under `name`. Does nothing while the profiler
+    is disabled.
+
+    Usage:
+    >>> with profile("load data"):
+    ...     data = np.load("data.npy")
+
+    """
+
+    __slots__ = ("name", "registry", "_start", "_mem_start")
+
+    def __init__(self, name: str, registry: Profiler = None):
+        self.name = name
+        self.registry = registry or profiler
+        self._start = None
+
+    def __enter__(self):
+        registry = self.registry
+        if registry.enabled:
+            self._mem_start = registry._mem_enter() if registry.memory else None
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self._start is None:
+            return
+        elapsed = time.perf_counter() - self._start
+        self._start = None
+        peak = None
+        if self._mem_start is not None:
+            peak = self.registry._mem_exit(self._mem_start)
+        self.registry.record(self.name, elapsed, peak)
+
+
+def profiled(func: Callable = None, *, name: str = None,
+             registry: Profiler = None) -> Callable:
+    """
+    Decorator recording each call of a function in the profiler.
+
+    If the profiler is disabled when the function is decorated, the function
+    is returned unchanged, so instrumentation costs nothing; set
+    JBURT_PROFILE before importing the modules to be profiled.
+
+    Parameters
+    ----------
+    func : Callable
+    name : str, optional
+        registry key. defaults to the function's module and qualified name
+    registry : Profiler, optional
+        defaults to the module-level `profiler`
+
+    Usage:
+    >>> @profiled
+    ... def step(batch): ...
+
+    """
+    if func is None:
+        return functools.partial(profiled, name=name, registry=registry)
+    registry = registry or profiler
+    if not registry.enabled:
+        return func
+    key = name or f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not registry.enabled:
+            return func(*args, **kwargs)
+        with profile(key, registry):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+if os.environ.get(PROFILE_OUT_ENV):
+    atexit.register(lambda: profiler.to_json(os.environ[PROFILE_OUT_ENV]))
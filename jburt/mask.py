@@ -2,7 +2,10 @@ from typing import List
 
 import numpy as np
 
+from .log import profiled
 
+
+@profiled
 def mask_nan(arrays: List[np.ndarray]) -> List[np.ndarray]:
     """
     Drop indices from equal-sized arrays if the element at that index is NaN in
@@ -4,7 +4,11 @@ General mathematical transformations and statistical methods.
 """
 
 import numpy as np
-from scipy.stats import zscore
+
+from .lazy import lazy_import
+from .log import profiled
+
+scipy_stats = lazy_import("scipy.stats")
 
 
 def modified_zscore(x: np.ndarray) -> np.ndarray:
@@ -31,6 +35,7 @@ def modified_zscore(x: np.ndarray) -> np.ndarray:
     return (x - med) / (1.486 * med_abs_dev)
 
 
+@profiled
 def find_outliers(scores: np.ndarray,
                   threshold: float = 3.0,
                   max_iter: int = 5,
@@ -70,11 +75,11 @@ def find_outliers(scores: np.ndarray,
     for _ in range(max_iter):
         x = scores[remaining_idx]
         if tail == 0:
-            this_z = np.abs(zscore(x))
+            this_z = np.abs(scipy_stats.zscore(x))
         elif tail == 1:
-            this_z = zscore(x)
+            this_z = scipy_stats.zscore(x)
         elif tail == -1:
-            this_z = -zscore(x)
+            this_z = -scipy_stats.zscore(x)
         else:
             raise ValueError("Tail parameter %s not recognised." % tail)
 
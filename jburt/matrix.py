@@ -3,8 +3,12 @@ Functions that operate on matrices.
 """
 
 import numpy as np
-from scipy.sparse import csr_matrix
-from scipy.sparse.csgraph import reverse_cuthill_mckee
+
+from .lazy import lazy_import
+from .log import profiled
+
+sparse = lazy_import("scipy.sparse")
+csgraph = lazy_import("scipy.sparse.csgraph")
 
 
 def reorder_rcm(mat: np.ndarray, thresh: float) -> np.ndarray:
@@ -26,10 +30,11 @@ def reorder_rcm(mat: np.ndarray, thresh: float) -> np.ndarray:
 
     """
 
-    sparsemat = csr_matrix(mat > thresh)
-    return reverse_cuthill_mckee(sparsemat)
+    sparsemat = sparse.csr_matrix(mat > thresh)
+    return csgraph.reverse_cuthill_mckee(sparsemat)
 
 
+@profiled
 def find_diagonal_blocks(mat: np.ndarray) -> np.ndarray:
     """
     Find perfect diagonal sub-blocks in a block-diagonalized binary matrix.
@@ -2,9 +2,17 @@
 Utilities for working with Jupyter notebooks.
 """
 
+import codecs
+import hashlib
 import json
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 
-__all__ = ["read_ipynb", "code_from_nb", "code_from_file"]
+__all__ = ["read_ipynb", "iter_cells", "code_from_nb", "code_from_file", "convert_dir"]
 
 
 def read_ipynb(path: str) -> dict:
@@ -21,6 +29,176 @@ def read_ipynb(path: str) -> dict:
         return json.load(file)
 
 
+_STRUCTURAL = re.compile(r'["\[\]{}]')
+_NUMBER = re.compile(r"[-+0-9.eE]*")
+# body of a JSON string up to its closing quote, with escape sequences
+_STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+
+
+class _JsonScanner:
+    """Incremental tokenizer over a JSON text file, read in fixed-size chunks."""
+
+    def __init__(self, file, chunk_size: int = 1 << 16):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.json = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size: int = None) -> bool:
+        """Drop consumed text and read another chunk (of `size` bytes, by
+        default `chunk_size`). False at end of file."""
+        if self.eof:
+            return False
+        self.buf = self.buf[self.pos :]
+        self.pos = 0
+        raw = self.file.read(size or self.chunk_size)
+        self.eof = not raw
+        self.buf += self.decoder.decode(raw, final=self.eof)
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, without consuming it."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                raise ValueError("unexpected end of notebook")
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} at notebook offset {self.pos}")
+        self.pos += 1
+
+    def read_value(self):
+        """Decode the next JSON value."""
+        if self.peek() in "-0123456789":
+            # a number is only complete once a character after it is read;
+            # otherwise "1.25" split as "1." + "25" would decode as 1
+            while (_NUMBER.match(self.buf, self.pos).end() == len(self.buf)
+                   and self.fill()):
+                pass
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.json.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # the value continues past the buffer. double the read each
+                # time so a large value is decoded O(log n) times, not O(n)
+                size = max(size, len(self.buf) - self.pos)
+                if not self.fill(size):
+                    raise
+                continue
+            self.pos = end
+            return value
+
+    def skip_value(self) -> None:
+        """Consume the next JSON value without decoding it."""
+        char = self.peek()
+        if char not in '[{"':
+            self.read_value()
+            return
+        depth = 0
+        in_string = False
+        while True:
+            if in_string:
+                # str.find is much faster than a regex over long unescaped
+                # strings (e.g. base64 images); strings with escapes are
+                # matched by a regex so that escapes are skipped in C
+                end = self.buf.find('"', self.pos)
+                if end < 0:
+                    end = len(self.buf)
+                if self.buf.find("\\", self.pos, end) >= 0:
+                    end = _STRING_BODY.match(self.buf, self.pos).end()
+                if end < len(self.buf) and self.buf[end] == '"':
+                    self.pos = end + 1
+                    in_string = False
+                    if depth == 0:
+                        return
+                    continue
+                # the string continues in the next chunk; a trailing
+                # backslash is kept so that it escapes the next character
+                self.pos = end
+            else:
+                m = _STRUCTURAL.search(self.buf, self.pos)
+                if m is not None:
+                    self.pos = m.end()
+                    char = m.group()
+                    if char == '"':
+                        in_string = True
+                    elif char in "[{":
+                        depth += 1
+                    else:
+                        depth -= 1
+                        if depth == 0:
+                            return
+                    continue
+                self.pos = len(self.buf)
+            if not self.fill():
+                raise ValueError("unexpected end of notebook")
+
+    def iter_object(self):
+        """Yield the keys of the object at the current position; the caller
+        must consume each key's value before advancing."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.read_value()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self.pos += 1
+            else:
+                self.expect("}")
+                return
+
+
+def iter_cells(path: str, skip: tuple = ("outputs", "attachments")):
+    """
+    Stream cells from a Jupyter notebook without loading the whole file.
+
+    The notebook is tokenized incrementally. Keys of each cell listed in `skip`
+    are scanned over without being decoded, so memory use is bounded by the
+    largest remaining cell rather than by embedded images and outputs.
+
+    Args:
+        path (str): Path to the Jupyter notebook.
+        skip (tuple, optional): Cell keys to skip. Defaults to
+            ("outputs", "attachments").
+
+    Yields:
+        dict: Cells from the Jupyter notebook, without the skipped keys.
+    """
+    with open(path, "rb") as file:
+        scanner = _JsonScanner(file)
+        for key in scanner.iter_object():
+            if key != "cells":
+                scanner.skip_value()
+                continue
+            scanner.expect("[")
+            if scanner.peek() == "]":
+                return
+            while True:
+                cell = {}
+                for cell_key in scanner.iter_object():
+                    if cell_key in skip:
+                        scanner.skip_value()
+                    else:
+                        cell[cell_key] = scanner.read_value()
+                yield cell
+                if scanner.peek() == ",":
+                    scanner.pos += 1
+                else:
+                    scanner.expect("]")
+                    return
+
+
 def prepend_header(src: str, i: int) -> str:
     """
     Prepend a header to a code cell.
@@ -118,6 +296,8 @@ def code_from_file(path: str, use_gpt_4=False) -> str:
     """
     Extract code from a Jupyter notebook file.
 
+    Cells are streamed with `iter_cells`, so cell outputs are never decoded.
+
     Args:
         path (str): Path to the Jupyter notebook.
         use_gpt_4 (bool, optional): Whether to use GPT-4. Defaults to False.
@@ -125,5 +305,109 @@ def code_from_file(path: str, use_gpt_4=False) -> str:
     Returns:
         str: Code extracted from the Jupyter notebook.
     """
-    nb = read_ipynb(path)
-    return code_from_nb(nb, use_gpt_4)
+    return code_from_nb({"cells": iter_cells(path)}, use_gpt_4)
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    """Write `text` to `path` via a temporary file, so readers never see a
+    partially written file. The file keeps the mode of the file it replaces,
+    or gets the umask's default mode if it is new."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.chmod(tmp, mode)  # mkstemp creates files as 0600
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _convert_one(src: str, dst: str, cached_hash: str) -> tuple:
+    """Convert one notebook unless its content hash matches `cached_hash`.
+    Errors, including I/O errors, are reported as a "failed" status."""
+    t0 = time.perf_counter()
+    try:
+        sha = hashlib.sha256()
+        with open(src, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                sha.update(block)
+        digest = sha.hexdigest()
+        if digest == cached_hash and os.path.exists(dst):
+            return digest, "cached", time.perf_counter() - t0
+        code = code_from_file(src)
+        _write_atomic(Path(dst), code)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        return None, f"failed: {e!r}", time.perf_counter() - t0
+    return digest, "converted", time.perf_counter() - t0
+
+
+def convert_dir(
+    src_dir: str,
+    out_dir: str = None,
+    cache_path: str = None,
+    n_jobs: int = None,
+) -> dict:
+    """
+    Convert every notebook under a directory to a python script.
+
+    Notebooks are converted on a process pool. A cache of content hashes from
+    the previous run is kept, and notebooks whose hash is unchanged (and whose
+    script still exists) are skipped. Scripts and the cache are written
+    atomically.
+
+    Args:
+        src_dir (str): Directory searched recursively for .ipynb files.
+            .ipynb_checkpoints directories are ignored.
+        out_dir (str, optional): Directory for the scripts, mirroring the
+            layout of `src_dir`. Defaults to `src_dir`.
+        cache_path (str, optional): Hash cache file. Defaults to
+            ".nbconvert_cache.json" in `out_dir`.
+        n_jobs (int, optional): Number of worker processes. Defaults to the
+            number of CPUs.
+
+    Returns:
+        dict: For each notebook path relative to `src_dir`, a dict with
+            "status" ("converted", "cached", or "failed: <error>") and
+            "seconds".
+    """
+    from .file import walk_files
+
+    src_dir = Path(src_dir)
+    out_dir = Path(out_dir) if out_dir is not None else src_dir
+    if cache_path is None:
+        cache_path = out_dir / ".nbconvert_cache.json"
+    cache_path = Path(cache_path)
+    try:
+        with open(cache_path, "r", encoding="utf-8") as file:
+            cache = json.load(file)
+    except (OSError, ValueError):
+        cache = {}
+
+    rel_paths = sorted(
+        os.path.relpath(entry.path, src_dir)
+        for entry in walk_files(src_dir, ".ipynb", exclude=".ipynb_checkpoints")
+    )
+    srcs = [str(src_dir / rel) for rel in rel_paths]
+    dsts = [str((out_dir / rel).with_suffix(".py")) for rel in rel_paths]
+    hashes = [cache.get(rel) for rel in rel_paths]
+
+    report = {}
+    new_cache = {}
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        chunksize = max(1, len(srcs) // (4 * (n_jobs or os.cpu_count() or 1)))
+        results = pool.map(_convert_one, srcs, dsts, hashes, chunksize=chunksize)
+        for rel, (digest, status, seconds) in zip(rel_paths, results):
+            if digest is not None:
+                new_cache[rel] = digest
+            report[rel] = {"status": status, "seconds": seconds}
+
+    _write_atomic(cache_path, json.dumps(new_cache, indent=1, sort_keys=True))
+    return report
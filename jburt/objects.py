@@ -3,6 +3,9 @@ Custom object definitions.
 
 """
 
+import keyword
+from functools import lru_cache
+
 
 class dotdict(dict):
     """dot notation get-access to dictionary attributes"""
@@ -15,3 +18,154 @@ class dotdict(dict):
 
     __setattr__ = dict.__setitem__
     __delattr__ = dict.__delitem__
+
+
+class Record(object):
+    """
+    Base class of compact records with fixed fields, made by `record_type`.
+
+    Fields are stored in `__slots__`, so records have no per-instance dict.
+    Nested dicts are converted to records on first access to their field.
+    """
+
+    __slots__ = ()
+    _fields = ()
+
+    def __repr__(self):
+        items = ", ".join(f"{f}={getattr(self, f)!r}" for f in self._fields)
+        return f"{type(self).__name__}({items})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Record) or self._fields != other._fields:
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self._fields)
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return _rebuild_record, (type(self).__name__, self._fields,
+                                 tuple(getattr(self, f) for f in self._fields))
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __getitem__(self, field):
+        if field not in self._fields:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def keys(self):
+        return self._fields
+
+    def to_dict(self, cls=dict) -> dict:
+        """Convert to a dict (or `cls`, e.g. dotdict), recursively."""
+        out = cls()
+        for f in self._fields:
+            value = getattr(self, "_" + f)  # raw: don't convert nested dicts
+            if isinstance(value, Record):
+                value = value.to_dict(cls)
+            elif type(value) is dict and cls is not dict:
+                value = record(value).to_dict(cls)
+            out[f] = value
+        return out
+
+    def to_dotdict(self) -> dotdict:
+        return self.to_dict(dotdict)
+
+    @classmethod
+    def from_dict(cls, mapping: dict) -> "Record":
+        """Make a record from a dict or dotdict. Nested dicts stay as they
+        are until their field is read."""
+        if cls is Record:
+            cls = record_type(tuple(mapping))
+        return cls(**mapping)
+
+
+_RESERVED = frozenset(dir(Record))
+
+
+def record_type(fields, name: str = "Record") -> type:
+    """
+    Class of records with the given fields, created once and cached.
+
+    The 1024 most recently used (fields, name) combinations are cached;
+    records are meant for a modest, fixed set of schemas.
+
+    Parameters
+    ----------
+    fields : Sequence[str]
+        field names; must be identifiers not starting with an underscore
+    name : str, default 'Record'
+        class name
+
+    Returns
+    -------
+    type
+        subclass of Record, constructed with the fields as (keyword)
+        arguments
+
+    Usage:
+    >>> Point = record_type(["x", "y"], "Point")
+    >>> p = Point(1, y={"z": 2})
+    >>> p.y.z
+    2
+
+    """
+    return _record_type(tuple(fields), name)
+
+
+@lru_cache(maxsize=1024)
+def _record_type(fields: tuple, name: str) -> type:
+    for f in fields:
+        if (not isinstance(f, str) or not f.isidentifier() or f.startswith("_")
+                or keyword.iskeyword(f) or f in _RESERVED):
+            raise ValueError(f"invalid record field name: {f!r}")
+    if len(set(fields)) != len(fields):
+        raise ValueError("duplicate record field names")
+
+    # generated source, as for collections.namedtuple: plain attribute
+    # stores in __init__, and accessors that convert nested dicts lazily.
+    # __init__'s first parameter has a name no field can have
+    lines = [f"def __init__(__rec_self, {', '.join(fields)}):"]
+    lines += [f"    __rec_self._{f} = {f}" for f in fields] or ["    pass"]
+    for f in fields:
+        lines += [
+            f"def get_{f}(self):",
+            f"    value = self._{f}",
+            "    if type(value) is dict or type(value) is dotdict:",
+            f"        value = self._{f} = record(value)",
+            "    return value",
+            f"def set_{f}(self, value):",
+            f"    self._{f} = value",
+        ]
+    ns = {"record": record, "dotdict": dotdict}
+    exec("\n".join(lines), ns)
+    body = {"__slots__": tuple("_" + f for f in fields), "_fields": fields,
+            "__init__": ns["__init__"], "__module__": __name__}
+    for f in fields:
+        body[f] = property(ns[f"get_{f}"], ns[f"set_{f}"])
+    return type(name, (Record,), body)
+
+
+def record(mapping: dict = None, **kwargs) -> Record:
+    """
+    Make a record from a dict, dotdict and/or keyword arguments.
+
+    Usage:
+    >>> r = record({"lr": 1e-3, "model": {"depth": 4}})
+    >>> r.model.depth
+    4
+
+    """
+    if mapping is None:
+        mapping = kwargs
+    elif kwargs:
+        mapping = {**mapping, **kwargs}
+    return record_type(tuple(mapping))(**mapping)
+
+
+def _rebuild_record(name, fields, values):
+    return record_type(fields, name)(*values)
@@ -1,5 +1,12 @@
 # Observer Pattern
 
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
 
 class Subscriber:
     def __init__(self, name):
@@ -24,6 +31,215 @@ class Publisher:
             subscriber.update(message)
 
 
+class _Mailbox:
+    """Bounded queue of (message, enqueue time) for one subscriber."""
+
+    def __init__(self, subscriber, maxsize):
+        self.ref = weakref.ref(subscriber)
+        self.name = getattr(subscriber, "name", repr(subscriber))
+        self.queue = deque()
+        self.maxsize = maxsize
+        self.cond = threading.Condition()
+        self.scheduled = False
+        self.closed = False
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+        self.latencies = deque(maxlen=10000)
+
+
+class AsyncPublisher(Publisher):
+    """
+    Publisher that delivers messages from a thread pool, so that a slow
+    subscriber does not hold up publishing or the other subscribers.
+
+    Each subscriber has its own bounded queue, drained by at most one worker
+    at a time, so it receives messages in the order they were published.
+    Subscribers are held by weak reference and are dropped once they are
+    garbage collected.
+
+    Parameters
+    ----------
+    maxsize : int, default 1024
+        capacity of each subscriber's queue
+    overflow : {'block', 'drop_new', 'drop_old'}, default 'block'
+        what `notify` does when a queue is full: wait for room, discard the
+        new message, or discard the oldest queued message
+    batch_size : int, default 1
+        maximum messages delivered per call. subscribers with an
+        `update_batch(messages)` method receive them as a list; others get
+        one `update` call per message
+    n_jobs : int, optional
+        number of worker threads. defaults to ThreadPoolExecutor's default
+
+    Usage:
+    >>> with AsyncPublisher(maxsize=100, overflow="drop_old") as pub:
+    ...     pub.register(alice)
+    ...     pub.notify("Breaking News! Water is wet.")
+    ...     pub.join()
+    ...     pub.stats()["Alice"]["delivered"]
+    1
+
+    """
+
+    OVERFLOW_POLICIES = ("block", "drop_new", "drop_old")
+
+    def __init__(self, maxsize: int = 1024, overflow: str = "block",
+                 batch_size: int = 1, n_jobs: Optional[int] = None):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {self.OVERFLOW_POLICIES}")
+        if maxsize < 1 or batch_size < 1:
+            raise ValueError("maxsize and batch_size must be positive")
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.batch_size = batch_size
+        self._mailboxes = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=n_jobs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def subscribers(self):
+        return set(self._mailboxes.keys())
+
+    def register(self, subscriber):
+        with self._lock:
+            if subscriber not in self._mailboxes:
+                self._mailboxes[subscriber] = _Mailbox(subscriber, self.maxsize)
+
+    def unregister(self, subscriber):
+        with self._lock:
+            box = self._mailboxes.pop(subscriber, None)
+        if box is not None:
+            self._close_mailbox(box)
+
+    @staticmethod
+    def _close_mailbox(box):
+        with box.cond:
+            box.closed = True
+            box.dropped += len(box.queue)
+            box.queue.clear()
+            box.cond.notify_all()
+
+    def notify(self, message):
+        with self._lock:
+            boxes = list(self._mailboxes.values())
+        now = time.perf_counter()
+        for box in boxes:
+            with box.cond:
+                if len(box.queue) >= box.maxsize:
+                    if self.overflow == "drop_new":
+                        box.dropped += 1
+                        continue
+                    if self.overflow == "drop_old":
+                        box.queue.popleft()
+                        box.dropped += 1
+                    else:
+                        box.cond.wait_for(
+                            lambda: len(box.queue) < box.maxsize or box.closed)
+                if box.closed:
+                    continue
+                box.queue.append((message, now))
+                if box.scheduled:
+                    continue
+                box.scheduled = True
+            self._pool.submit(self._drain, box)
+
+    def _drain(self, box):
+        """Deliver one batch, then reschedule so subscribers share workers."""
+        with box.cond:
+            n = min(self.batch_size, len(box.queue))
+            batch = [box.queue.popleft() for _ in range(n)]
+            box.cond.notify_all()
+        subscriber = box.ref()
+        if subscriber is None:
+            self._close_mailbox(box)
+            batch = []
+        try:
+            if len(batch) > 1 and hasattr(subscriber, "update_batch"):
+                subscriber.update_batch([m for m, _ in batch])
+            else:
+                for message, _ in batch:
+                    subscriber.update(message)
+        except Exception as e:
+            with box.cond:
+                box.errors += 1
+                box.last_error = e
+        done = time.perf_counter()
+        del subscriber
+        with box.cond:
+            box.delivered += len(batch)
+            box.latencies.extend(done - t for _, t in batch)
+            if box.queue and not box.closed:
+                self._pool.submit(self._drain, box)
+            else:
+                box.scheduled = False
+                box.cond.notify_all()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued message has been delivered.
+
+        Returns
+        -------
+        bool
+            False if `timeout` seconds passed first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            boxes = list(self._mailboxes.values())
+        for box in boxes:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            with box.cond:
+                if not box.cond.wait_for(
+                        lambda: not (box.queue or box.scheduled) or box.closed,
+                        remaining):
+                    return False
+        return True
+
+    def stats(self) -> dict:
+        """
+        Delivery metrics per subscriber, keyed by name (or repr).
+
+        Latencies, in seconds from `notify` to the end of delivery, are
+        summarized over the last 10000 messages.
+        """
+        with self._lock:
+            boxes = list(self._mailboxes.values())
+        out = {}
+        for box in boxes:
+            with box.cond:
+                lat = sorted(box.latencies)
+                entry = dict(delivered=box.delivered, dropped=box.dropped,
+                             errors=box.errors, last_error=box.last_error,
+                             queued=len(box.queue))
+            if lat:
+                entry.update(
+                    latency_mean=sum(lat) / len(lat),
+                    latency_p50=lat[len(lat) // 2],
+                    latency_p99=lat[min(int(len(lat) * 0.99), len(lat) - 1)],
+                    latency_max=lat[-1])
+            out[box.name] = entry
+        return out
+
+    def close(self, wait: bool = True) -> None:
+        """Stop accepting messages; deliver queued ones first if `wait`."""
+        if wait:
+            self.join()
+        with self._lock:
+            boxes = list(self._mailboxes.values())
+            self._mailboxes.clear()
+        for box in boxes:
+            self._close_mailbox(box)
+        self._pool.shutdown(wait=wait)
+
+
 if __name__ == "__main__":
     pub = Publisher()
 
@@ -0,0 +1,365 @@
+"""
+Minimal PDF writer for embedding raster images without rendering them.
+
+Pages are written to disk as soon as they are added, so memory use is bounded
+by the images of a single page.
+"""
+
+import struct
+import zlib
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from .types import PathLike
+
+__all__ = ["PdfImage", "ImagePdfWriter", "fit_image", "grid_boxes",
+           "png_to_pdf_image", "pil_to_pdf_image", "load_pdf_image"]
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# PNG color type -> (PDF color space, number of color components)
+_PNG_COLOR_TYPES = {0: (b"/DeviceGray", 1), 2: (b"/DeviceRGB", 3),
+                    3: (None, 1)}
+
+
+class PdfImage(object):
+    """
+    Encoded image ready to be embedded as a PDF image XObject.
+
+    Parameters
+    ----------
+    width : int
+        width in pixels
+    height : int
+        height in pixels
+    data : bytes
+        encoded pixel data
+    colorspace : bytes
+        PDF color space, e.g. b'/DeviceRGB'
+    filter : bytes
+        PDF stream filter, e.g. b'/FlateDecode' or b'/DCTDecode'
+    bpc : int, default 8
+        bits per component
+    decode_parms : bytes, optional
+        PDF /DecodeParms dictionary
+    smask : PdfImage, optional
+        grayscale alpha channel
+
+    """
+
+    __slots__ = ("width", "height", "data", "colorspace", "filter", "bpc",
+                 "decode_parms", "smask")
+
+    def __init__(self, width: int, height: int, data: bytes,
+                 colorspace: bytes, filter: bytes = b"/FlateDecode",
+                 bpc: int = 8, decode_parms: Optional[bytes] = None,
+                 smask: Optional["PdfImage"] = None):
+        self.width = width
+        self.height = height
+        self.data = data
+        self.colorspace = colorspace
+        self.filter = filter
+        self.bpc = bpc
+        self.decode_parms = decode_parms
+        self.smask = smask
+
+
+def fit_image(width: float, height: float,
+              box: Tuple[float, float, float, float]
+              ) -> Tuple[float, float, float, float]:
+    """
+    Scale an image to fit in a box, preserving aspect ratio, and center it.
+
+    Parameters
+    ----------
+    width : float
+        image width
+    height : float
+        image height
+    box : tuple
+        (x, y, width, height) of the box
+
+    Returns
+    -------
+    tuple
+        (x, y, width, height) of the placed image
+
+    """
+    bx, by, bw, bh = box
+    scale = min(bw / width, bh / height)
+    w, h = width * scale, height * scale
+    return bx + (bw - w) / 2, by + (bh - h) / 2, w, h
+
+
+def grid_boxes(page_size: Tuple[float, float], grid: Tuple[int, int],
+               pad: float = 0.0) -> List[Tuple[float, float, float, float]]:
+    """
+    Split a page into a grid of cells, filled row by row from the top left.
+
+    Parameters
+    ----------
+    page_size : tuple
+        (width, height) of the page
+    grid : tuple
+        (rows, columns)
+    pad : float, default 0
+        padding inside each cell
+
+    Returns
+    -------
+    List[tuple]
+        (x, y, width, height) of each cell, measured from the bottom left
+
+    """
+    rows, cols = grid
+    cw, ch = page_size[0] / cols, page_size[1] / rows
+    return [(c * cw + pad, page_size[1] - (r + 1) * ch + pad,
+             cw - 2 * pad, ch - 2 * pad)
+            for r in range(rows) for c in range(cols)]
+
+
+def pil_to_pdf_image(im, jpeg_quality: Optional[int] = None) -> PdfImage:
+    """
+    Encode a PIL image.
+
+    Parameters
+    ----------
+    im : PIL.Image.Image
+        image in any mode; transparency is kept as a soft mask
+    jpeg_quality : int, optional
+        if given, compress color data as JPEG at this quality (1-95) instead
+        of losslessly
+
+    Returns
+    -------
+    PdfImage
+
+    """
+    smask = None
+    if im.mode in ("RGBA", "LA", "PA") or (
+            im.mode == "P" and "transparency" in im.info):
+        im = im.convert("RGBA")
+        alpha = im.getchannel("A")
+        if alpha.getextrema() != (255, 255):
+            smask = PdfImage(im.width, im.height,
+                             zlib.compress(alpha.tobytes()), b"/DeviceGray")
+        im = im.convert("RGB")
+    elif im.mode not in ("L", "RGB"):
+        im = im.convert("RGB")
+    colorspace = b"/DeviceGray" if im.mode == "L" else b"/DeviceRGB"
+
+    if jpeg_quality is not None:
+        import io
+
+        buf = io.BytesIO()
+        im.save(buf, format="JPEG", quality=jpeg_quality)
+        return PdfImage(im.width, im.height, buf.getvalue(), colorspace,
+                        filter=b"/DCTDecode", smask=smask)
+    return PdfImage(im.width, im.height, zlib.compress(im.tobytes()),
+                    colorspace, smask=smask)
+
+
+def png_to_pdf_image(path: PathLike) -> PdfImage:
+    """
+    Encode a PNG file.
+
+    Opaque, non-interlaced PNGs are embedded by copying their compressed
+    IDAT data, which PDF can decode directly; no pixels are decoded. Other
+    PNGs (alpha channel, interlacing) are decoded with Pillow.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+
+    Returns
+    -------
+    PdfImage
+
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    if raw[:8] != _PNG_SIGNATURE:
+        raise ValueError(f"not a PNG file: {path}")
+
+    pos = 8
+    idat = []
+    palette = None
+    header = None
+    passthrough = True
+    while pos < len(raw):
+        length, kind = struct.unpack(">I4s", raw[pos:pos + 8])
+        chunk = raw[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", chunk)
+        elif kind == b"PLTE":
+            palette = chunk
+        elif kind == b"tRNS":
+            passthrough = False
+        elif kind == b"IDAT":
+            idat.append(chunk)
+        elif kind == b"IEND":
+            break
+
+    width, height, bpc, color_type, _, _, interlace = header
+    if not passthrough or interlace or color_type not in _PNG_COLOR_TYPES:
+        from PIL import Image
+
+        with Image.open(path) as im:
+            return pil_to_pdf_image(im)
+
+    colorspace, colors = _PNG_COLOR_TYPES[color_type]
+    if color_type == 3:
+        colorspace = b"[/Indexed /DeviceRGB %d <%s>]" % (
+            len(palette) // 3 - 1, palette.hex().encode())
+    decode_parms = b"<< /Predictor 15 /Colors %d /BitsPerComponent %d " \
+                   b"/Columns %d >>" % (colors, bpc, width)
+    return PdfImage(width, height, b"".join(idat), colorspace, bpc=bpc,
+                    decode_parms=decode_parms)
+
+
+def load_pdf_image(path: PathLike,
+                   max_size: Optional[Tuple[int, int]] = None,
+                   jpeg_quality: Optional[int] = None) -> PdfImage:
+    """
+    Encode a PNG file, downsampling it to fit within `max_size` pixels.
+
+    Images that need neither downsampling nor JPEG compression are embedded
+    without decoding, as in `png_to_pdf_image`.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+    max_size : tuple, optional
+        (width, height) in pixels; larger images are downsampled to fit,
+        preserving aspect ratio
+    jpeg_quality : int, optional
+        if given, compress color data as JPEG at this quality
+
+    Returns
+    -------
+    PdfImage
+
+    """
+    if max_size is not None or jpeg_quality is not None:
+        from PIL import Image
+
+        with Image.open(path) as im:
+            too_big = max_size is not None and (
+                im.width > max_size[0] or im.height > max_size[1])
+            if too_big or jpeg_quality is not None:
+                if too_big:
+                    im.thumbnail(max_size, Image.Resampling.LANCZOS,
+                                 reducing_gap=3.0)
+                return pil_to_pdf_image(im, jpeg_quality)
+    return png_to_pdf_image(path)
+
+
+class ImagePdfWriter(object):
+    """
+    Write images to a PDF, one page at a time.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        output file
+
+    Usage:
+    >>> with ImagePdfWriter("out.pdf") as pdf:
+    ...     img = png_to_pdf_image("a.png")
+    ...     box = fit_image(img.width, img.height, (0, 0, 648, 648))
+    ...     pdf.add_page([(img, box)], (648, 648))
+
+    """
+
+    def __init__(self, path: PathLike):
+        self._f = open(path, "wb")
+        self._f.write(b"%PDF-1.5\n%\xe2\xe3\xcf\xd3\n")
+        self._offsets = {}
+        self._next = 3  # 1: catalog, 2: page tree
+        self._pages = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write(self, num: int, body: bytes,
+               stream: Optional[bytes] = None) -> None:
+        self._offsets[num] = self._f.tell()
+        self._f.write(b"%d 0 obj\n" % num)
+        if stream is None:
+            self._f.write(body + b"\nendobj\n")
+        else:
+            self._f.write(b"<< %s /Length %d >>\nstream\n" % (body, len(stream)))
+            self._f.write(stream)
+            self._f.write(b"\nendstream\nendobj\n")
+
+    def _new(self) -> int:
+        num = self._next
+        self._next += 1
+        return num
+
+    def _write_image(self, img: PdfImage) -> int:
+        smask = b""
+        if img.smask is not None:
+            smask = b" /SMask %d 0 R" % self._write_image(img.smask)
+        num = self._new()
+        body = b"/Type /XObject /Subtype /Image /Width %d /Height %d " \
+               b"/ColorSpace %s /BitsPerComponent %d /Filter %s%s" % (
+                   img.width, img.height, img.colorspace, img.bpc,
+                   img.filter, smask)
+        if img.decode_parms is not None:
+            body += b" /DecodeParms " + img.decode_parms
+        self._write(num, body, img.data)
+        return num
+
+    def add_page(self, images: Sequence[Tuple[PdfImage, Tuple[float, ...]]],
+                 page_size: Tuple[float, float]) -> None:
+        """
+        Add a page holding one or more images.
+
+        Parameters
+        ----------
+        images : Sequence[Tuple[PdfImage, tuple]]
+            each image with its (x, y, width, height) placement, in points
+            from the bottom-left corner of the page
+        page_size : tuple
+            (width, height) in points (1/72 inch)
+
+        """
+        xobjects: List[bytes] = []
+        content: List[bytes] = []
+        for i, (img, (x, y, w, h)) in enumerate(images):
+            num = self._write_image(img)
+            xobjects.append(b"/Im%d %d 0 R" % (i, num))
+            content.append(b"q %.4f 0 0 %.4f %.4f %.4f cm /Im%d Do Q" % (
+                w, h, x, y, i))
+        contents = self._new()
+        self._write(contents, b"", b"\n".join(content))
+        page = self._new()
+        self._write(page, b"<< /Type /Page /Parent 2 0 R "
+                          b"/MediaBox [0 0 %.4f %.4f] "
+                          b"/Resources << /XObject << %s >> >> "
+                          b"/Contents %d 0 R >>" % (
+                              page_size[0], page_size[1],
+                              b" ".join(xobjects), contents))
+        self._pages.append(page)
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        kids = b" ".join(b"%d 0 R" % p for p in self._pages)
+        self._write(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            kids, len(self._pages)))
+        self._write(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref = self._f.tell()
+        self._f.write(b"xref\n0 %d\n0000000000 65535 f \n" % self._next)
+        for num in range(1, self._next):
+            self._f.write(b"%010d 00000 n \n" % self._offsets[num])
+        self._f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n"
+                      b"%d\n%%%%EOF\n" % (self._next, xref))
+        self._f.close()
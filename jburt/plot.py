@@ -1,18 +1,82 @@
 import pathlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from time import perf_counter
 
 import numpy as np
-from matplotlib import image as mpimg
-from matplotlib import pyplot as plt
-from matplotlib.backends.backend_pdf import PdfPages
 
+from .lazy import lazy_import
 from .types import Numeric
 from .types import PathLike
 
-
-def aggregate(root_dir: PathLike, fname: str, figsize=(9, 9)):
+clrs = lazy_import("matplotlib.colors")
+plt = lazy_import("matplotlib.pyplot")
+
+DEFAULT_CMAP = "Spectral"
+
+
+def _imap_bounded(func, items, n_jobs=None, max_pending=4):
+    """Ordered, threaded map that keeps at most `max_pending` results alive."""
+    with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(func, item))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _aggregate_embed(
+    files, fout, figsize, grid, dpi, jpeg_quality, n_jobs, max_pending
+):
+    from functools import partial
+
+    from .pdf import ImagePdfWriter
+    from .pdf import fit_image
+    from .pdf import grid_boxes
+    from .pdf import load_pdf_image
+
+    page = (figsize[0] * 72.0, figsize[1] * 72.0)
+    boxes = grid_boxes(page, grid, pad=0.0 if grid == (1, 1) else 4.0)
+    max_size = None
+    if dpi is not None:
+        max_size = (
+            max(1, int(boxes[0][2] / 72.0 * dpi)),
+            max(1, int(boxes[0][3] / 72.0 * dpi)),
+        )
+    load = partial(load_pdf_image, max_size=max_size, jpeg_quality=jpeg_quality)
+    images = _imap_bounded(load, files, n_jobs, max(max_pending, len(boxes)))
+    with ImagePdfWriter(fout) as pdf:
+        placed = []
+        for img in images:
+            box = boxes[len(placed)]
+            placed.append((img, fit_image(img.width, img.height, box)))
+            if len(placed) == len(boxes):
+                pdf.add_page(placed, page)
+                placed = []
+        if placed:
+            pdf.add_page(placed, page)
+
+
+def aggregate(
+    root_dir: PathLike,
+    fname: str,
+    figsize=(9, 9),
+    mode="render",
+    n_jobs=None,
+    max_pending=4,
+    grid=(1, 1),
+    dpi=None,
+    jpeg_quality=None,
+):
     """
     Create multi-page PDF of all PNG files in a directory.
 
+    Pages are ordered by file name.
+
     Parameters
     ----------
     root_dir: str or pathlib.Path
@@ -21,14 +85,44 @@ def aggregate(root_dir: PathLike, fname: str, figsize=(9, 9)):
         name of output file
     figsize: tuple
         image (width, height)
+    mode : {'render', 'embed'}, default 'render'
+        'render' draws each image into a matplotlib figure. 'embed' writes the
+        image data straight into the PDF without rendering: opaque PNGs are
+        copied without decoding, other PNGs are decoded on a thread pool, and
+        each image is scaled to fit a `figsize` page
+    n_jobs : int, optional
+        number of decoding threads in 'embed' mode
+    max_pending : int, default 4
+        number of images decoded ahead of the writer in 'embed' mode; bounds
+        memory use
+    grid : tuple, default (1, 1)
+        (rows, columns) of images per page, filled row by row ('embed' mode)
+    dpi : float, optional
+        downsample images larger than their grid cell at this resolution
+        ('embed' mode)
+    jpeg_quality : int, optional
+        recompress images as JPEG at this quality (1-95); suited to
+        photographic content ('embed' mode)
 
     """
     if not isinstance(root_dir, pathlib.Path):
         root_dir = pathlib.Path(root_dir)
     fout = root_dir.joinpath(fname).with_suffix(".pdf")
-    files = list(root_dir.glob("*.png"))
+    files = sorted(root_dir.glob("*.png"))
     if not files:
         raise RuntimeError(f"no png images exist in {str(root_dir)}")
+    if mode == "embed":
+        _aggregate_embed(
+            files, fout, figsize, tuple(grid), dpi, jpeg_quality, n_jobs, max_pending
+        )
+        return
+    elif mode != "render":
+        raise ValueError(f"unknown mode: {mode}")
+    if tuple(grid) != (1, 1) or dpi is not None or jpeg_quality is not None:
+        raise ValueError("grid, dpi and jpeg_quality require mode='embed'")
+    from matplotlib import image as mpimg
+    from matplotlib.backends.backend_pdf import PdfPages
+
     pdf = PdfPages(str(fout))
     for file in files:
         if file.suffix not in [".pdf", ".png"]:
@@ -42,6 +136,80 @@ def aggregate(root_dir: PathLike, fname: str, figsize=(9, 9)):
     pdf.close()
 
 
+def _render_init():
+    import matplotlib
+
+    matplotlib.use("Agg", force=True)
+    import matplotlib.pyplot  # noqa: F401 -- import once per worker
+
+
+def _render_one(func, item, path, dpi):
+    t0 = perf_counter()
+    if isinstance(item, dict):
+        fig = func(**item)
+    elif isinstance(item, tuple):
+        fig = func(*item)
+    else:
+        fig = func(item)
+    if fig is None:
+        fig = plt.gcf()
+    fig.savefig(path, dpi=dpi)
+    plt.close(fig)
+    return perf_counter() - t0
+
+
+def render_batch(
+    func, items, outdir: PathLike, prefix="fig", fmt="png", dpi=None, n_jobs=None
+):
+    """
+    Render many figures in parallel on a process pool.
+
+    Each worker process switches to the Agg backend and imports matplotlib
+    once. Output files are numbered in input order, so `aggregate` (which
+    sorts by name) keeps that order.
+
+    Parameters
+    ----------
+    func : callable
+        module-level (picklable) plotting function. it is called with each
+        element of `items` -- unpacked if a tuple (positional args) or dict
+        (keyword args) -- and should return a matplotlib Figure. if it
+        returns None, the current figure is saved
+    items : Iterable
+        argument sets, one per figure
+    outdir : str or pathlib.Path
+        output directory; created if needed
+    prefix : str, default 'fig'
+        output file name prefix
+    fmt : str, default 'png'
+        output format, e.g. 'png' or 'pdf'
+    dpi : float, optional
+        resolution passed to ``savefig``
+    n_jobs : int, optional
+        number of worker processes; defaults to the number of CPUs
+
+    Returns
+    -------
+    list[pathlib.Path]
+        output files, in input order
+    list[float]
+        wall time, in seconds, to draw and save each figure
+
+    """
+    outdir = pathlib.Path(outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    items = list(items)
+    width = max(5, len(str(len(items))))
+    files = [outdir / f"{prefix}_{i:0{width}d}.{fmt}" for i in range(len(items))]
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_render_init) as pool:
+        futures = [
+            pool.submit(_render_one, func, item, path, dpi)
+            for item, path in zip(items, files)
+        ]
+        timings = [future.result() for future in futures]
+    return files, timings
+
+
 def prettify_legend(leg, lw: int = 0, fc: str = "none"):
     """
     Prettify legend.
@@ -131,16 +299,112 @@ def update_style(ax, figbg="w", axbg="#e2e2e2", textcolor="k", gridcolor="w"):
     ax.set_facecolor(axbg)
 
 
-def relative_luminance(rgb):
-    # rgb = (r, g, b), where each element in [0, 255]
-    def _transf(x):
-        if x <= 10:
-            return x / 3294.0
-        return (x / 269 + 0.0513) ** 2.4
+def _finite_range(values, chunk_size):
+    lo, hi = np.inf, -np.inf
+    for i in range(0, len(values), chunk_size):
+        chunk = np.asarray(values[i : i + chunk_size], dtype=float)
+        chunk = chunk[np.isfinite(chunk)]
+        if chunk.size:
+            lo, hi = min(lo, chunk.min()), max(hi, chunk.max())
+    if lo > hi:  # no finite values
+        return 0.0, 1.0
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    return lo, hi
+
+
+def density_scatter(
+    ax,
+    x,
+    y,
+    bins=None,
+    extent=None,
+    cmap="viridis",
+    log=True,
+    chunk_size=1_000_000,
+    **kwargs,
+):
+    """
+    Draw a very large scatter plot as a 2-D histogram image.
 
-    Rg, Gg, Bg = map(_transf, rgb)
+    Points are binned at (by default) the on-screen resolution of `ax`, so the
+    cost of drawing and the size of saved files do not grow with the number of
+    points. Empty bins are transparent, so the axis background (e.g. from
+    `update_style`) shows through, and `despine` etc. apply as usual.
 
-    return 0.2126 * Rg + 0.7152 * Gg + 0.0722 * Bg
+    Parameters
+    ----------
+    ax : matplotlib.axes.Axes
+        axis to draw on
+    x : (N,) array_like
+        x coordinates; may be a np.memmap
+    y : (N,) array_like
+        y coordinates
+    bins : int or (int, int), optional
+        number of (x, y) bins; defaults to the axis size in pixels
+    extent : tuple, optional
+        (xmin, xmax, ymin, ymax) of the binned region; defaults to the finite
+        range of the data, or (0, 1) along an axis with no finite values.
+        points outside are ignored
+    cmap : str or matplotlib.colors.Colormap, default 'viridis'
+        colormap for point counts
+    log : bool, default True
+        use a logarithmic color scale
+    chunk_size : int, default 1,000,000
+        points binned at a time; bounds temporary memory use
+    kwargs
+        passed to ``ax.imshow``
+
+    Returns
+    -------
+    matplotlib.image.AxesImage
+
+    """
+    if len(x) != len(y):
+        raise ValueError("x and y must be the same length")
+    if bins is None:
+        bbox = ax.get_window_extent()
+        bins = (max(1, int(bbox.width)), max(1, int(bbox.height)))
+    elif np.isscalar(bins):
+        bins = (int(bins), int(bins))
+    nx, ny = bins
+    if extent is None:
+        extent = _finite_range(x, chunk_size) + _finite_range(y, chunk_size)
+    x0, x1, y0, y1 = map(float, extent)
+    sx, sy = nx / (x1 - x0), ny / (y1 - y0)
+
+    counts = np.zeros(nx * ny, dtype=np.int64)
+    for i in range(0, len(x), chunk_size):
+        xc = np.asarray(x[i : i + chunk_size], dtype=float)
+        yc = np.asarray(y[i : i + chunk_size], dtype=float)
+        ix = np.floor((xc - x0) * sx)
+        iy = np.floor((yc - y0) * sy)
+        # include points on the upper edges, as np.histogram2d does
+        ix[xc == x1] = nx - 1
+        iy[yc == y1] = ny - 1
+        ok = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+        flat = ix[ok].astype(np.intp) * ny + iy[ok].astype(np.intp)
+        counts += np.bincount(flat, minlength=nx * ny)
+
+    image = np.ma.masked_equal(counts.reshape(nx, ny).T, 0)
+    if log and image.count():
+        kwargs.setdefault("norm", clrs.LogNorm(vmin=1, vmax=image.max()))
+    kwargs.setdefault("interpolation", "nearest")
+    kwargs.setdefault("aspect", "auto")
+    im = ax.imshow(
+        image, origin="lower", extent=(x0, x1, y0, y1), cmap=cmap, **kwargs
+    )
+    ax.set_xlim(x0, x1)
+    ax.set_ylim(y0, y1)
+    return im
+
+
+def relative_luminance(rgb):
+    # rgb = (r, g, b), where each element in [0, 255]; or an (N,3)/(N,4)
+    # array of such colors, in which case an (N,) array is returned
+    rgb = np.asarray(rgb, dtype=float)[..., :3]
+    lin = np.where(rgb <= 10, rgb / 3294.0, (np.abs(rgb) / 269 + 0.0513) ** 2.4)
+    return lin @ np.array([0.2126, 0.7152, 0.0722])
 
 
 def contrast_ratio(rgb):
@@ -149,6 +413,91 @@ def contrast_ratio(rgb):
     return 1.05 / (relative_luminance(rgb) + 0.05)
 
 
+def text_color_multi(rgb, dark="#000000", light="#ffffff"):
+    """
+    Choose a legible text color for each of many background colors.
+
+    Parameters
+    ----------
+    rgb : (N,3) or (N,4) array_like
+        background colors, each element in [0, 255]
+    dark : str, default '#000000'
+        color returned for light backgrounds
+    light : str, default '#ffffff'
+        color returned for dark backgrounds
+
+    Returns
+    -------
+    (N,) np.ndarray[str]
+        `dark` or `light`, whichever contrasts more with each background
+
+    """
+    lum = relative_luminance(np.atleast_2d(rgb))
+    # contrast with white, 1.05 / (L + 0.05), vs. with black, (L + 0.05) / 0.05
+    use_light = 1.05 * 0.05 >= (lum + 0.05) ** 2
+    return np.where(use_light, light, dark)
+
+
+@lru_cache(maxsize=32)
+def _palette_lut(cmap, n, endpoint):
+    lut = plt.get_cmap(cmap)(np.linspace(0, 1, n, endpoint=endpoint))
+    lut.setflags(write=False)  # shared between Palette instances
+    return lut
+
+
+class Palette:
+    """
+    Lookup table of `n` colors sampled evenly from a colormap.
+
+    The colormap is sampled once; tables for colormap names are cached per
+    (cmap, n, endpoint), so building the same palette again is free. Lookups
+    accept scalar or array indices.
+
+    Parameters
+    ----------
+    n : int
+        number of colors
+    cmap : str or matplotlib.colors.Colormap, default 'hsv'
+        colormap
+    endpoint : bool, default True
+        sample the colormap at i / (n - 1), so that the last color is the end
+        of the colormap; if False, sample at i / n (better for cyclic maps)
+
+    Usage:
+    >>> pal = Palette(100_000, "viridis")
+    >>> rgba = pal.rgba(labels)  # (N,4)
+    >>> hexes = pal.hex(labels)  # (N,) np.ndarray[str]
+
+    """
+
+    def __init__(self, n, cmap="hsv", endpoint=True):
+        if isinstance(cmap, str):
+            self.lut = _palette_lut(cmap, n, endpoint)
+        else:
+            self.lut = cmap(np.linspace(0, 1, n, endpoint=endpoint))
+        self._hex = None
+
+    def __len__(self):
+        return len(self.lut)
+
+    def _index(self, index):
+        return np.clip(np.asarray(index, dtype=np.intp), 0, len(self.lut) - 1)
+
+    def rgba(self, index):
+        """(4,) or (N,4) rgba color(s) at integer `index`."""
+        return self.lut[self._index(index)]
+
+    def hex(self, index):
+        """Hex string(s) of the color(s) at integer `index`."""
+        if self._hex is None:
+            self._hex = np.array(rgb2hex_multi(self.lut))
+        return self._hex[self._index(index)]
+
+    def __call__(self, index):
+        rgba = self.rgba(index)
+        return tuple(rgba.tolist()) if rgba.ndim == 1 else rgba
+
+
 def unique_color_cmap(n, cmap="hsv"):
     """
     Return a function that maps each index in 0, ... n-1 to a unique color.
@@ -162,21 +511,12 @@ def unique_color_cmap(n, cmap="hsv"):
 
     Returns
     -------
-    callable
-        matplotlib.colors.ScalarMappable object
+    Palette
+        callable returning an rgba tuple for a scalar index, or an (N,4)
+        array for an array of indices
 
     """
-    import matplotlib.cm as cmx
-    import matplotlib.colors as colors
-
-    color_norm = colors.Normalize(vmin=0, vmax=n - 1)
-    scalar_map = cmx.ScalarMappable(norm=color_norm, cmap=cmap)
-
-    def map_index_to_rgb_color(index):
-        """Generate cmx.ScalarMappable from integer index to unique color."""
-        return scalar_map.to_rgba(index)
-
-    return map_index_to_rgb_color
+    return Palette(n, cmap)
 
 
 def generate_colors(cmap="Spectral", i=0, n=8):
@@ -215,6 +555,75 @@ def adjust_luminosity(color, amount=0.75):
     return mc.rgb2hex(tmp)
 
 
+def _rgb_to_hls_multi(rgb):
+    """Vectorized colorsys.rgb_to_hls over the rows of an (N,3) array."""
+    r, g, b = rgb.T
+    maxc = rgb.max(axis=1)
+    minc = rgb.min(axis=1)
+    sumc = maxc + minc
+    rangec = maxc - minc
+    l = sumc / 2.0
+    gray = rangec == 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = np.where(l <= 0.5, rangec / sumc, rangec / (2.0 - sumc))
+        rc = (maxc - r) / rangec
+        gc = (maxc - g) / rangec
+        bc = (maxc - b) / rangec
+    h = np.where(
+        r == maxc, bc - gc, np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc)
+    )
+    h = (h / 6.0) % 1.0
+    return np.stack([np.where(gray, 0.0, h), l, np.where(gray, 0.0, s)], axis=1)
+
+
+def _hls_to_rgb_multi(hls):
+    """Vectorized colorsys.hls_to_rgb over the rows of an (N,3) array."""
+    h, l, s = hls.T
+    m2 = np.where(l <= 0.5, l * (1.0 + s), l + s - l * s)
+    m1 = 2.0 * l - m2
+
+    def _v(hue):
+        hue = hue % 1.0
+        return np.select(
+            [hue < 1 / 6, hue < 0.5, hue < 2 / 3],
+            [m1 + (m2 - m1) * hue * 6.0, m2, m1 + (m2 - m1) * (2 / 3 - hue) * 6.0],
+            m1,
+        )
+
+    rgb = np.stack([_v(h + 1 / 3), _v(h), _v(h - 1 / 3)], axis=1)
+    return np.where((s == 0)[:, None], l[:, None], rgb)
+
+
+def adjust_luminosity_multi(colors, amount=0.75, as_hex=False):
+    """
+    Adjust luminosity of many colors at once.
+
+    Vectorized equivalent of `adjust_luminosity`.
+
+    Parameters
+    ----------
+    colors : (N,3) or (N,4) array_like, or list of str
+        rgb(a) colors with elements in [0, 1], or matplotlib color strings
+    amount : float or (N,) array_like
+        amount of adjustment; values above (below) 1 lighten (darken) color
+    as_hex : bool, default False
+        return hex strings instead of an array
+
+    Returns
+    -------
+    (N,3) np.ndarray or list[str]
+        adjusted colors
+
+    """
+    import matplotlib.colors as mc
+
+    rgb = mc.to_rgba_array(colors)[:, :3]
+    hls = _rgb_to_hls_multi(rgb)
+    hls[:, 1] = np.clip(np.asarray(amount, dtype=float) * hls[:, 1], 0, 1)
+    rgb = _hls_to_rgb_multi(hls)
+    return rgb2hex_multi(rgb) if as_hex else rgb
+
+
 def mix_colors(fc, bc, fc_alpha=0.5):
     """
     Combine two semi-transparent colors.
@@ -247,13 +656,71 @@ def mix_colors(fc, bc, fc_alpha=0.5):
     return [r, g, b, a]
 
 
+def mix_colors_multi(fc, bc, fc_alpha=0.5) -> np.ndarray:
+    """
+    Combine many pairs of semi-transparent colors at once.
+
+    Vectorized equivalent of `mix_colors`; inputs broadcast against each
+    other, so e.g. N foreground colors can be mixed with one background.
+
+    Parameters
+    ----------
+    fc : (N,3) array_like
+        foreground colors
+    bc : (N,3) or (3,) array_like
+        background colors
+    fc_alpha : float or (N,) array_like, default 0.5
+        alpha (transparency) of foreground colors
+
+    Returns
+    -------
+    (N,4) np.ndarray
+        rgba of the colors produced by overlapping `fc` and `bc`
+
+    """
+    fc = np.atleast_2d(np.asarray(fc, dtype=float))[:, :3]
+    bc = np.atleast_2d(np.asarray(bc, dtype=float))[:, :3]
+    fa = np.asarray(fc_alpha, dtype=float).reshape(-1, 1)
+    # the background is opaque, so the combined alpha is always 1
+    rgb = fc * fa + bc * (1 - fa)
+    return np.concatenate([rgb, np.ones((rgb.shape[0], 1))], axis=1)
+
+
 def rgb2hex(rgb: list, keep_alpha=False) -> str:
     return clrs.to_hex(rgb, keep_alpha=keep_alpha)
 
 
+_HEX_BYTES = [f"{i:02x}" for i in range(256)]
+
+
+def rgb2hex_multi(rgb, keep_alpha=False) -> list[str]:
+    """
+    Convert many colors to hex strings.
+
+    Parameters
+    ----------
+    rgb : (N,3) or (N,4) array_like
+        colors, each element in [0, 1]
+    keep_alpha : bool, default False
+        include the alpha channel, if present
+
+    Returns
+    -------
+    list[str]
+        '#rrggbb' (or '#rrggbbaa') strings
+
+    """
+    rgb = np.atleast_2d(np.asarray(rgb, dtype=float))
+    if not keep_alpha:
+        rgb = rgb[:, :3]
+    ints = np.round(np.clip(rgb, 0, 1) * 255).astype(np.intp).tolist()
+    h = _HEX_BYTES
+    return ["#" + "".join([h[v] for v in row]) for row in ints]
+
+
 def hex2rgb(color: str):
     return clrs.to_rgb(color)
 
 
-def n_hex_colors(N: int) -> list[str]:
-    return [rgb2hex(generate_colors(DEFAULT_CMAP, i, N)) for i in range(N)]
+def n_hex_colors(N: int, cmap=DEFAULT_CMAP) -> list[str]:
+    return Palette(N, cmap, endpoint=False).hex(np.arange(N)).tolist()
@@ -3,12 +3,16 @@ Utility functions for processing signals/waveforms.
 """
 
 import numpy as np
-from scipy.interpolate import CubicSpline
-from scipy.signal import welch
 
+from .lazy import lazy_import
+from .log import profiled
 from .types import Numeric
 
+interpolate = lazy_import("scipy.interpolate")
+scipy_signal = lazy_import("scipy.signal")
 
+
+@profiled
 def fwhm_spline(waveform: np.ndarray, upsample: int = 100) -> float:
     """
     Compute full width at half-max using cubic spline interpolation.
@@ -27,7 +31,7 @@ def fwhm_spline(waveform: np.ndarray, upsample: int = 100) -> float:
         full width at half max, in units of input samples
 
     """
-    spline = CubicSpline(x=np.arange(waveform.size), y=waveform)
+    spline = interpolate.CubicSpline(x=np.arange(waveform.size), y=waveform)
     xs = np.arange(0, waveform.size + 1. / upsample, 1. / upsample)
     waveform_upsampled = spline(xs)
     peakidx = np.abs(waveform_upsampled).argmax()
@@ -70,7 +74,7 @@ def find_peak_freq(signal: np.ndarray, sfreq: Numeric,
         frequency with most spectral power
 
     """
-    freq, power = welch(
+    freq, power = scipy_signal.welch(
         signal, fs=sfreq, window="hann",
         nperseg=nperseg, noverlap=noverlap, scaling='spectrum'
     )
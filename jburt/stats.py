@@ -1,12 +1,14 @@
 from typing import Collection
 
 import numpy as np
-from scipy import special as special
-from scipy.stats import pearsonr
-from scipy.stats import rankdata
 
+from .lazy import lazy_import
+from .log import profiled
 from .mask import mask_nan
 
+special = lazy_import("scipy.special")
+scipy_stats = lazy_import("scipy.stats")
+
 
 def nonparp(stat: float, null_dist: Collection) -> float:
     """
@@ -47,9 +49,10 @@ def abs_pearson(x: np.ndarray, y: np.ndarray) -> float:
         absolute value of correlation
 
     """
-    return abs(pearsonr(x, y)[0])
+    return abs(scipy_stats.pearsonr(x, y)[0])
 
 
+@profiled
 def pearsonr_multi(X: np.ndarray, Y: np.ndarray) -> np.ndarray:
     """
     Multi-dimensional Pearson correlation between rows of `X` and `Y`.
@@ -91,6 +94,7 @@ def pearsonr_multi(X: np.ndarray, Y: np.ndarray) -> np.ndarray:
     return cov / np.dot(s_x[:, np.newaxis], s_y[np.newaxis, :])
 
 
+@profiled
 def spearmanr_multi(X, Y) -> np.ndarray:
     """
     Multi-dimensional Spearman rank correlation between rows of `X` and `Y`.
@@ -115,7 +119,8 @@ def spearmanr_multi(X, Y) -> np.ndarray:
     ranks.
 
     """
-    return pearsonr_multi(rankdata(X, axis=1), rankdata(Y, axis=1))
+    return pearsonr_multi(
+        scipy_stats.rankdata(X, axis=1), scipy_stats.rankdata(Y, axis=1))
 
 
 def pairwise_r(X, flatten=False) -> np.ndarray:
@@ -288,7 +293,7 @@ def pearsonr_weighted(x, y, w=None):
     assert x.size == y.size
     if w is None:
         x, y = mask_nan([x, y])
-        return pearsonr(x, y)
+        return scipy_stats.pearsonr(x, y)
     else:
         assert type(w) == np.ndarray and w.size == x.size
         x, y, w = mask_nan([x, y, w])
@@ -1,20 +1,173 @@
+import asyncio
+import os
 import pathlib
+import random
+import shutil
+import tempfile
+import weakref
 
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from openai import OpenAI
+from ..lazy import lazy_import
+from .split import iter_chunks
 
-client = OpenAI()
+openai = lazy_import("openai")
+
+_client = None
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_client():
+    """Shared OpenAI client, constructed on first use."""
+    global _client
+    if _client is None:
+        _client = openai.OpenAI()
+    return _client
+
+
+def get_async_client():
+    """Async OpenAI client shared on the running event loop, constructed on
+    first use there. Its connections are bound to that loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = openai.AsyncOpenAI()
+    return client
 
 
 def tts(body, outdir, fname="speech.mp3"):
     speech_file = pathlib.Path(str(outdir)) / fname
-    response = client.audio.speech.create(
+    response = get_client().audio.speech.create(
         model="tts-1",
         voice="alloy",
         input=body,
     )
     with open(speech_file, "wb") as f:
-        f.write(response.audio)
+        f.write(response.content)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Rate limits, server errors, timeouts and dropped connections."""
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    if isinstance(exc, (OSError, asyncio.TimeoutError)):
+        return True
+    return isinstance(exc, openai.APIConnectionError)
+
+
+async def _speak_chunk(client, text, part, semaphore, max_retries, backoff, params):
+    """Stream the audio for one chunk to `part`, retrying with backoff."""
+    for attempt in range(max_retries + 1):
+        try:
+            async with semaphore:
+                create = client.audio.speech.with_streaming_response.create
+                async with create(input=text, **params) as response:
+                    with open(part, "wb") as f:
+                        async for data in response.iter_bytes():
+                            f.write(data)
+            return
+        except Exception as e:
+            if attempt == max_retries or not _is_retryable(e):
+                raise
+            await asyncio.sleep(backoff * 2**attempt + random.uniform(0, backoff))
+
+
+async def tts_chunks(
+    chunks,
+    outfile,
+    client=None,
+    concurrency=4,
+    max_retries=5,
+    backoff=1.0,
+    model="tts-1",
+    voice="alloy",
+    **params,
+):
+    """
+    Synthesize speech for many text chunks concurrently into one audio file.
+
+    Up to `concurrency` requests run at once. Each response is streamed to a
+    temporary part file as it arrives, and parts are appended to `outfile` in
+    chunk order as soon as all earlier chunks are done, so audio is never
+    held in memory. `outfile` only appears once it is complete.
+
+    Parameters
+    ----------
+    chunks : Iterable[str]
+        text chunks, e.g. from `split`
+    outfile : str or pathlib.Path
+        output audio file
+    client : openai.AsyncOpenAI, optional
+        client, or any object with the same
+        ``audio.speech.with_streaming_response.create`` interface. defaults
+        to a shared AsyncOpenAI client
+    concurrency : int, default 4
+        maximum number of requests in flight
+    max_retries : int, default 5
+        retries per chunk on rate limits, server errors and connection errors
+    backoff : float, default 1.0
+        base delay in seconds; attempt k waits backoff * 2**k plus jitter
+    model : str, default 'tts-1'
+    voice : str, default 'alloy'
+    params
+        other arguments to ``audio.speech.create``, e.g. response_format
+
+    Returns
+    -------
+    pathlib.Path
+        `outfile`
+
+    """
+    client = client or get_async_client()
+    outfile = pathlib.Path(outfile)
+    params = dict(params, model=model, voice=voice)
+    semaphore = asyncio.Semaphore(concurrency)
+    with tempfile.TemporaryDirectory(dir=outfile.parent, prefix=".tts-") as tmp:
+        parts = []
+        tasks = []
+        for i, text in enumerate(chunks):
+            parts.append(os.path.join(tmp, f"{i:06d}.part"))
+            tasks.append(
+                asyncio.ensure_future(
+                    _speak_chunk(
+                        client, text, parts[-1], semaphore, max_retries, backoff, params
+                    )
+                )
+            )
+        partial = os.path.join(tmp, "output")
+        try:
+            with open(partial, "wb") as out:
+                for task, part in zip(tasks, parts):
+                    await task
+                    with open(part, "rb") as f:
+                        shutil.copyfileobj(f, out)
+                    os.remove(part)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        os.replace(partial, outfile)
+    return outfile
+
+
+def tts_long(body, outdir, fname="speech.mp3", chars=4000, **kwargs):
+    """
+    Synthesize speech for a long text by splitting it into chunks.
+
+    Blocking wrapper around `tts_chunks`; `kwargs` are passed to it. Unless
+    a client is given, each call opens and closes its own.
+    """
+    speech_file = pathlib.Path(str(outdir)) / fname
+
+    async def run():
+        if kwargs.get("client") is not None:
+            return await tts_chunks(split(body, chars), speech_file, **kwargs)
+        async with openai.AsyncOpenAI() as client:
+            return await tts_chunks(
+                split(body, chars), speech_file, client=client, **kwargs
+            )
+
+    return asyncio.run(run())
 
 
 def dump(responses, outdir):
@@ -24,10 +177,4 @@ def dump(responses, outdir):
 
 
 def split(text: str, chars: int = 4000) -> list[str]:
-    return RecursiveCharacterTextSplitter(
-        separators=["\n\n", "\n", " "],
-        is_separator_regex=True,
-        chunk_size=chars,
-        chunk_overlap=0,
-        length_function=len,
-    ).split_text(text)
+    return list(iter_chunks(text, max_chars=chars))
@@ -0,0 +1,231 @@
+"""
+Streaming, token-aware text splitting.
+"""
+
+import io
+import pathlib
+from functools import lru_cache
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+from ..lazy import lazy_import
+
+tiktoken = lazy_import("tiktoken")
+
+__all__ = ["count_tokens", "iter_chunks"]
+
+DEFAULT_SEPARATORS = ("\n\n", "\n", " ")
+
+
+def _encode(text: str, encoding: str) -> list:
+    return tiktoken.get_encoding(encoding).encode(text, disallowed_special=())
+
+
+@lru_cache(maxsize=1 << 16)
+def _count_tokens_cached(text: str, encoding: str) -> int:
+    return len(_encode(text, encoding))
+
+
+def count_tokens(text: str, encoding: str = "cl100k_base") -> int:
+    """Number of tokens in `text`. Counts for short texts are cached."""
+    if len(text) <= 4096:
+        return _count_tokens_cached(text, encoding)
+    return len(_encode(text, encoding))
+
+
+class _Budget:
+    """Character and/or token limits for a chunk."""
+
+    def __init__(self, max_chars: Optional[int], max_tokens: Optional[int],
+                 encoding: str):
+        if max_chars is None and max_tokens is None:
+            raise ValueError("at least one of max_chars, max_tokens is required")
+        self.max_chars = max_chars
+        self.max_tokens = max_tokens
+        self.encoding = encoding
+        self._encoded = None  # (text, token ids) of the last long text sized
+
+    def size(self, text: str) -> Tuple[int, int]:
+        chars = len(text)
+        if self.max_tokens is None or (
+                self.max_chars is not None and chars > self.max_chars):
+            return chars, 0  # tokens are irrelevant to whether it fits
+        if chars <= 4096:
+            return chars, count_tokens(text, self.encoding)
+        if self._encoded is not None and self._encoded[0] is text:
+            return chars, len(self._encoded[1])
+        ids = _encode(text, self.encoding)
+        self._encoded = (text, ids)  # reused if `text` must be split further
+        return chars, len(ids)
+
+    def fits(self, chars: int, tokens: int) -> bool:
+        return ((self.max_chars is None or chars <= self.max_chars)
+                and (self.max_tokens is None or tokens <= self.max_tokens))
+
+    def _token_pieces(self, text: str) -> Iterator[Tuple[str, int]]:
+        """Cut text into pieces of at most `max_tokens` tokens, at token
+        boundaries that do not split a multi-byte character."""
+        cached, self._encoded = self._encoded, None
+        if cached is not None and cached[0] is text:
+            ids = cached[1]
+        else:
+            ids = _encode(text, self.encoding)
+        enc = tiktoken.get_encoding(self.encoding)
+        i = 0
+        while i < len(ids):
+            j = min(i + self.max_tokens, len(ids))
+            piece = _decode_strict(enc, ids[i:j])
+            # back off while the cut falls inside a character; if even one
+            # token is incomplete, extend instead so that no text is lost
+            while piece is None and j > i + 1:
+                j -= 1
+                piece = _decode_strict(enc, ids[i:j])
+            while piece is None:
+                j += 1
+                piece = _decode_strict(enc, ids[i:j])
+            yield piece, j - i
+            i = j
+
+    def hard_split(self, text: str) -> Iterator[Tuple[str, int, int]]:
+        """Split text with no separators left into pieces within budget,
+        yielding (piece, chars, tokens)."""
+        if self.max_chars is None or len(text) <= self.max_chars:
+            blocks = [text]
+        else:
+            blocks = [text[i:i + self.max_chars]
+                      for i in range(0, len(text), self.max_chars)]
+        for block in blocks:
+            if self.max_tokens is None:
+                yield block, len(block), 0
+                continue
+            for piece, tokens in self._token_pieces(block):
+                yield piece, len(piece), tokens
+
+
+def _decode_strict(enc, ids: list) -> Optional[str]:
+    """Decode tokens, or None if they end (or start) inside a character."""
+    try:
+        return enc.decode_bytes(ids).decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+
+
+def _pieces(text: str, separators: Sequence[str], budget: _Budget
+            ) -> Iterator[Tuple[str, int, int]]:
+    """Recursively split `text` at `separators` into pieces within budget.
+    Separators stay attached to the end of the preceding piece."""
+    chars, tokens = budget.size(text)
+    if budget.fits(chars, tokens):
+        yield text, chars, tokens
+        return
+    if not separators:
+        yield from budget.hard_split(text)
+        return
+    sep, rest = separators[0], separators[1:]
+    parts = text.split(sep)
+    for i, part in enumerate(parts):
+        piece = part + sep if i < len(parts) - 1 else part
+        if piece:
+            yield from _pieces(piece, rest, budget)
+
+
+def _blocks(source, block_size: int) -> Iterator[str]:
+    """Read text from a str, pathlib.Path, file object or iterable of str."""
+    if isinstance(source, str):
+        yield source
+    elif isinstance(source, pathlib.Path):
+        with open(source, "r", encoding="utf-8") as f:
+            yield from iter(lambda: f.read(block_size), "")
+    elif hasattr(source, "read"):
+        yield from iter(lambda: source.read(block_size), "")
+    else:
+        yield from source
+
+
+def _complete_segments(blocks: Iterable[str], separators: Sequence[str],
+                       block_size: int) -> Iterator[str]:
+    """Re-cut a stream of blocks so that each segment ends on the coarsest
+    separator found, holding back at most a partial segment."""
+    parts, size = [], 0
+    for block in blocks:
+        parts.append(block)
+        size += len(block)
+        if size < block_size:
+            continue
+        buf = "".join(parts)
+        for sep in separators:
+            cut = buf.rfind(sep)
+            if cut >= 0:
+                cut += len(sep)
+                break
+        else:
+            cut = len(buf)
+        yield buf[:cut]
+        buf = buf[cut:]
+        parts, size = [buf], len(buf)
+    buf = "".join(parts)
+    if buf:
+        yield buf
+
+
+def iter_chunks(
+    source: Union[str, pathlib.Path, io.TextIOBase, Iterable[str]],
+    max_chars: Optional[int] = 4000,
+    max_tokens: Optional[int] = None,
+    separators: Sequence[str] = DEFAULT_SEPARATORS,
+    encoding: str = "cl100k_base",
+    block_size: int = 1 << 20,
+) -> Iterator[str]:
+    """
+    Lazily split text into chunks within a character and/or token budget.
+
+    Text is split at the coarsest separator that yields pieces within budget
+    (paragraphs, then lines, then words), and consecutive pieces are merged
+    up to the budget. Input is read incrementally, so memory use is bounded
+    by `block_size` plus one chunk, regardless of the size of the input.
+
+    Parameters
+    ----------
+    source : str, pathlib.Path, file object or Iterable[str]
+        text itself, a UTF-8 file to read, an open text file, or an iterable
+        of text fragments
+    max_chars : int or None, default 4000
+        maximum characters per chunk
+    max_tokens : int, optional
+        maximum tokens per chunk, counted with tiktoken. a chunk's count is
+        the sum of its pieces' (cached) counts, which may differ slightly
+        from the count of the joined text
+    separators : Sequence[str], default ('\\n\\n', '\\n', ' ')
+        separators, from coarsest to finest
+    encoding : str, default 'cl100k_base'
+        tiktoken encoding used when `max_tokens` is given
+    block_size : int, default 1 MB
+        number of characters read at a time
+
+    Yields
+    ------
+    str
+        chunks, with leading and trailing whitespace stripped; empty chunks
+        are skipped
+
+    """
+    budget = _Budget(max_chars, max_tokens, encoding)
+    buf, chars, tokens = [], 0, 0
+    for segment in _complete_segments(_blocks(source, block_size), separators,
+                                      block_size):
+        for piece, n_chars, n_tokens in _pieces(segment, separators, budget):
+            if buf and not budget.fits(chars + n_chars, tokens + n_tokens):
+                chunk = "".join(buf).strip()
+                if chunk:
+                    yield chunk
+                buf, chars, tokens = [], 0, 0
+            buf.append(piece)
+            chars += n_chars
+            tokens += n_tokens
+    chunk = "".join(buf).strip()
+    if chunk:
+        yield chunk
@@ -15,7 +15,6 @@ install_reqs = [
     "pyarrow",
     "black",
     "tiktoken",
-    "langchain",
 ]
 
 setup(
@@ -29,6 +28,7 @@ setup(
     long_description_content_type="text/markdown",
     packages=find_packages(),
     install_requires=install_reqs,
+    extras_require={"fast": ["orjson"]},
     python_requires=">=3",
     classifiers=[
         "Programming Language :: Python :: 3.10",
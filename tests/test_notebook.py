@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from jburt.notebook import _JsonScanner
+from jburt.notebook import iter_cells
+
+
+CELLS = [
+    {"cell_type": "code", "execution_count": 12, "metadata": {"w": -1.5e-3},
+     "source": ["x = 1.25\n", "y = \"\\\\\"\n"],
+     "outputs": [{"data": {"text/plain": ["<b class=\"a\">\\n</b>"]}}]},
+    {"cell_type": "markdown", "metadata": {}, "source": ["# tést \U0001F600"]},
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 4, 5, 8, 16, 1 << 16])
+@pytest.mark.parametrize("prefix", [
+    {"a": 1.25},
+    {"a": -12.5e-3, "b": 1E+10},
+    {"a": 0, "b": 100},
+    {"a": [1.5, 2e3], "b": True, "c": None},
+])
+def test_iter_cells_chunk_boundaries(tmp_path, monkeypatch, chunk_size, prefix):
+    nb = {**prefix, "cells": CELLS, "nbformat": 4, "nbformat_minor": 5}
+    path = tmp_path / "nb.ipynb"
+    path.write_text(json.dumps(nb), encoding="utf-8")
+    monkeypatch.setattr(_JsonScanner.__init__, "__defaults__", (chunk_size,))
+    expected = [{k: v for k, v in c.items() if k not in ("outputs", "attachments")}
+                for c in CELLS]
+    assert list(iter_cells(str(path))) == expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 4, 8])
+@pytest.mark.parametrize("text", ["1.25", "-0.5e-10", "12E+3", "7", "[1.5, 2.25e1]"])
+def test_read_value_numbers(tmp_path, chunk_size, text):
+    path = tmp_path / "v.json"
+    path.write_text(text + " ,", encoding="utf-8")
+    with open(path, "rb") as file:
+        scanner = _JsonScanner(file, chunk_size)
+        assert scanner.read_value() == json.loads(text)
+        scanner.expect(",")
@@ -0,0 +1,35 @@
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from jburt.plot import density_scatter
+
+
+@pytest.mark.parametrize("x, y", [
+    (np.array([]), np.array([])),
+    (np.array([np.nan, np.inf]), np.array([1.0, 2.0])),
+    (np.array([1.0, 2.0]), np.array([np.nan, -np.inf])),
+])
+def test_density_scatter_without_finite_values(x, y):
+    fig, ax = plt.subplots()
+    try:
+        density_scatter(ax, x, y, bins=8)
+        xlim, ylim = ax.get_xlim(), ax.get_ylim()
+    finally:
+        plt.close(fig)
+    assert np.isfinite(xlim).all() and np.isfinite(ylim).all()
+
+
+def test_density_scatter_counts_points():
+    x = np.array([0.0, 0.0, 1.0])
+    y = np.array([0.0, 0.0, 1.0])
+    fig, ax = plt.subplots()
+    try:
+        im = density_scatter(ax, x, y, bins=2, log=False)
+    finally:
+        plt.close(fig)
+    assert np.nansum(np.asarray(im.get_array())) == 3